@@ -1,65 +1,48 @@
-from google import genai
-from google.genai import types
 import os
 import logging
 import hashlib
 import json
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from cache_store import cache, make_key
+from single_flight import analysis_flight
+from metrics import span, traced
+from llm_gateway import LLMGateway, LLMError
+from llm_backends import create_backend
+from filing_sections import select_sections, SECTIONS_VERSION
+from form4 import FORM4_VERSION, insider_metrics, format_transaction_table, routine_result
+from token_budget import (PLANNER_VERSION, COMPANY_TOKEN_BUDGET, BATCH_TOKEN_BUDGET, FILING_TOKEN_BUDGET,
+                          MAP_TOKEN_BUDGET, count_tokens, tokens_to_chars, plan_budget, format_plan)
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
+
 # Cache setup
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-
-# Initialize client
-api_key = os.getenv("GEMINI_API_KEY")
-client = None
-if not api_key:
-    logger.warning("GEMINI_API_KEY not found in environment variables. Analysis will fail.")
-else:
-    try:
-        client = genai.Client(api_key=api_key)
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini client: {e}")
+ANALYSIS_NAMESPACE = "analysis"
 
-def get_cache_path(key: str) -> str:
-    hash_key = hashlib.md5(key.encode('utf-8')).hexdigest()
-    return os.path.join(CACHE_DIR, f"analysis_{hash_key}.md")
+# "map_reduce" summarises each filing once (through analyze_filing's cache) and combines
+# the summaries; "single" sends all filings in one prompt
+COMPANY_ANALYSIS_MODE = os.getenv("COMPANY_ANALYSIS_MODE", "map_reduce")
+# Filing text per single-filing prompt, unless the map step's plan allots less
+FILING_MAX_CHARS = tokens_to_chars(FILING_TOKEN_BUDGET)
+# Concurrent per-filing LLM calls in the map step
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 4))
 
-def analyze_filing(ticker: str, form_type: str, text_content: str) -> str:
-    """
-    Analyze the text of a filing using Gemini 3 (or latest available).
-    Returns a markdown summary/analysis.
-    """
-    if not client:
-        return "Error: GEMINI_API_KEY not configured. Please check backend/.env"
+# Initialize the model backend (LLM_BACKEND: Gemini, or the offline fake)
+backend = create_backend()
 
-    if not text_content:
-        return "Error: No content to analyze."
-
-    # Check cache
-    # Key includes ticker, form, and content (to be safe if content changes, though unlikely for same URL)
-    # Using content hash is safer but slower if content is huge. 
-    # Let's use a hash of the content prefix + ticker + form as a proxy or just hash the content.
-    # To avoid huge hash overhead on every call if not needed, we can just hash the text.
-    cache_key = f"{ticker}_{form_type}_{text_content[:1000]}" # Simple key
-    # Better: Hash the full content. Python's hashlib is fast enough for 100k chars.
-    full_cache_key = f"{ticker}_{form_type}_{hashlib.md5(text_content.encode('utf-8')).hexdigest()}"
-    cache_path = get_cache_path(full_cache_key)
-
-    if os.path.exists(cache_path):
-        logger.info(f"Analysis cache hit for {ticker} {form_type}")
-        try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except:
-            pass
+# Concurrency, rate limits, timeouts, retries and the circuit breaker for every model call
+gateway = LLMGateway(backend) if backend else None
 
-    prompt = f"""
+# Prompt templates. Their hash is part of the cache keys, so editing a prompt
+# invalidates the analyses it produced.
+FILING_PROMPT = """
     You are a highly experienced financial analyst. 
     Analyze the following {form_type} filing for {ticker}.
     
@@ -72,70 +55,10 @@ def analyze_filing(ticker: str, form_type: str, text_content: str) -> str:
     Be concise but thorough. Use bullet points.
     
     Filing Content (truncated):
-    {text_content[:50000]} 
+    {content} 
     """
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.2
-            )
-        )
-        result = response.text
-        
-        # Save to cache
-        with open(cache_path, "w", encoding="utf-8") as f:
-            f.write(result)
-            
-        return result
-    except Exception as e:
-        logger.error(f"Gemini analysis failed: {e}")
-        return f"Analysis failed: {str(e)}"
-
-def analyze_company_comprehensive(ticker: str, filings_list: list) -> str:
-    """
-    Analyze a collection of filings (10-K, 10-Q, 8-K) to produce a comprehensive report.
-    filings_list: list of dicts { 'form': str, 'filingDate': str, 'content': str, 'accessionNumber': str }
-    """
-    if not client:
-        return "Error: GEMINI_API_KEY not configured."
-
-    if not filings_list:
-        return "No filings provided for analysis."
-
-    # Generate cache key based on the list of accession numbers (identifies the exact set of docs)
-    # Sort by date usually, but for hash order matters.
-    accession_ids = sorted([f.get('accessionNumber', '') for f in filings_list])
-    cache_key = f"comprehensive_{ticker}_{hashlib.md5(json.dumps(accession_ids).encode('utf-8')).hexdigest()}"
-    cache_path = get_cache_path(cache_key)
-
-    if os.path.exists(cache_path):
-        logger.info(f"Comprehensive analysis cache hit for {ticker} ({cache_key})")
-        try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except:
-            pass
 
-    # Construct Prompt
-    # We will feed summaries or truncated text of multiple documents.
-    # Given context limits, we should be careful. 
-    # Strategy: 
-    # 1. Identify which is the 10-K (Foundation)
-    # 2. Identify subsequent 8-Ks/10-Qs (Updates)
-    
-    combined_text = f"Comprehensive Analysis Context for {ticker}:\n\n"
-    
-    for filing in filings_list:
-        form = filing['form']
-        date = filing['filingDate']
-        content = filing.get('content', '')[:20000] # Cap per filing to fit context
-        
-        combined_text += f"---\nDOCUMENT: {form} (Filed: {date})\nCONTENT:\n{content}\n---\n\n"
-
-    prompt = f"""
+COMPANY_PROMPT = """
     You are a Chief Investment Officer preparing a comprehensive research report on {ticker}.
     
     You have access to the most recent 10-K/10-Q and subsequent 8-K filings below.
@@ -166,64 +89,40 @@ def analyze_company_comprehensive(ticker: str, filings_list: list) -> str:
     DATA:
     {combined_text}
     """
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview', 
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.3
-            )
-        )
-        result = response.text
-        
-        with open(cache_path, "w", encoding="utf-8") as f:
-            f.write(result)
-            
-        return result
-    except Exception as e:
-        logger.error(f"Comprehensive analysis failed: {e}")
-        return f"Comprehensive analysis failed: {str(e)}"
-
-
-def analyze_filings_batch(ticker: str, filings_list: list) -> str:
-    """
-    Analyze a batch of filings (e.g., multiple Form 4s from the same day).
-    filings_list: list of dicts { 'form': str, 'filingDate': str, 'content': str, 'accessionNumber': str }
-    """
-    if not client:
-        return "Error: GEMINI_API_KEY not configured."
-
-    if not filings_list:
-        return "No filings provided for analysis."
-
-    # Generate cache key
-    accession_ids = sorted([f.get('accessionNumber', '') for f in filings_list])
-    cache_key = f"batch_{ticker}_{hashlib.md5(json.dumps(accession_ids).encode('utf-8')).hexdigest()}"
-    cache_path = get_cache_path(cache_key)
-
-    if os.path.exists(cache_path):
-        logger.info(f"Batch analysis cache hit for {ticker}")
-        try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except:
-            pass
 
-    # Construct Prompt
-    combined_text = f"Batch Analysis Context for {ticker}:\n\n"
-    form_type = filings_list[0]['form'] if filings_list else "Filings"
+REDUCE_PROMPT = """
+    You are a Chief Investment Officer preparing a comprehensive research report on {ticker}.
     
-    for filing in filings_list:
-        form = filing['form']
-        date = filing['filingDate']
-        # For Form 4s, the content is usually short XML/HTML tables.
-        # We limit content size just in case.
-        content = filing.get('content', '')[:10000] 
-        
-        combined_text += f"---\nDOCUMENT: {form} (Filed: {date})\nACCESSION: {filing.get('accessionNumber')}\nCONTENT:\n{content}\n---\n\n"
+    Below are analyst notes on the most recent 10-K/10-Q and subsequent 8-K filings, one per filing.
+    
+    Your goal is to synthesize these notes into a single, cohesive "State of the Company" report.
+    
+    Structure your report as follows:
+    # {ticker} Comprehensive Analysis
+    
+    ## 1. Executive Summary
+    High-level outlook based on the latest annual/quarterly data and recent events.
+    
+    ## 2. Core Financial Review (Latest 10-K/10-Q)
+    Key metrics, growth trajectory, and balance sheet health.
+    
+    ## 3. Recent Developments (8-Ks)
+    Synthesize the recent 8-Ks. Do not just list them. Explain the *narrative* of what has happened since the last major report. 
+    - Leadership changes?
+    - Material agreements?
+    - Earnings releases?
+    
+    ## 4. Risk Assessment
+    Combine long-term risks (10-K) with any new risks unveiled in recent filings.
+    
+    ## 5. Investment Verdict
+    Bull/Bear case summary based on the totality of data.
+    
+    FILING NOTES:
+    {combined_text}
+    """
 
-    prompt = f"""
+BATCH_PROMPT = """
     You are a senior financial analyst specializing in insider trading interpretation.
     
     Goal: Analyze the following batch of {form_type} filings for {ticker} to determine an "Insider Confidence Score" (0-100).
@@ -239,6 +138,9 @@ def analyze_filings_batch(ticker: str, filings_list: list) -> str:
     3. **Cluster Buying**: Multiple insiders buying within a short period is a strong bullish multiplier.
     4. **Value**: High dollar value trades should have more impact.
     
+    When a transaction table parsed from the ownership XML is provided, its 10b5-1 column and the
+    precomputed metrics (dollar values, cluster buying) are authoritative.
+    
     Data:
     {combined_text}
     
@@ -254,27 +156,421 @@ def analyze_filings_batch(ticker: str, filings_list: list) -> str:
         ]
     }}
     """
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview', 
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.1,
-                response_mime_type="application/json"
-            )
-        )
-        result = response.text
-        
-        # Save to cache
-        with open(cache_path, "w", encoding="utf-8") as f:
-            f.write(result)
-            
+
+def _template_version(template: str) -> str:
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+def get_cache_key(kind: str, template: str, *parts) -> str:
+    """
+    Cache key for an analysis, versioned by model name and prompt template.
+    """
+    # Results from the offline fake must never be served as real analyses
+    model = MODEL_NAME if not backend or backend.name == "gemini" else f"{backend.name}:{MODEL_NAME}"
+    return make_key(kind, model, _template_version(template), *parts)
+
+# Latest token split per prompt kind, reported by /api/stats
+prompt_plans = {}
+
+def _record_plan(kind: str, ticker: str, plan: dict):
+    logger.info(f"{kind} prompt budget for {ticker}: {format_plan(plan)}")
+    prompt_plans[kind] = dict(plan, ticker=ticker)
+
+def budget_stats() -> dict:
+    return dict(prompt_plans)
+
+
+class AnalysisError(Exception):
+    """
+    An analysis that couldn't be produced. status_code is what the API should answer.
+    Failures are raised, never returned or cached as if they were analyses.
+    """
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _require_client():
+    if not gateway:
+        raise AnalysisError("GEMINI_API_KEY not configured (or set LLM_BACKEND=fake). Please check backend/.env",
+                            status_code=503)
+
+
+def _llm_failure(e: LLMError) -> AnalysisError:
+    logger.error(f"Gemini analysis failed: {e}")
+    # Upstream errors are a bad gateway to our clients, except throttling, outages and timeouts
+    status_code = e.status_code if e.status_code in (429, 503, 504) else 502
+    return AnalysisError(f"Analysis failed: {str(e)}", status_code=status_code)
+
+
+def _generate(cache_key: str, prompt: str, options: dict, cacheable: bool = True, validate=None) -> str:
+    """
+    Run a prompt through the gateway and cache the result. Concurrent identical
+    requests share one model call (single-flight on the cache key).
+    validate(result) may raise ValueError to reject a malformed response; it isn't cached.
+    Raises AnalysisError.
+    """
+    def run():
+        # Another caller may have finished between our cache miss and now
+        cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+        if cached is not None:
+            return cached
+        try:
+            with span("llm.generate"):
+                result = gateway.generate(MODEL_NAME, prompt, **options)
+        except LLMError as e:
+            raise _llm_failure(e)
+        if validate:
+            try:
+                validate(result)
+            except ValueError as e:
+                raise AnalysisError(f"Analysis failed: malformed response ({e})")
+        if cacheable:
+            cache.set(ANALYSIS_NAMESPACE, cache_key, result)
         return result
+
+    return analysis_flight.do(cache_key, run)
+
+
+def _generate_stream(cache_key: str, prompt: str, options: dict, cacheable: bool = True):
+    """
+    Yield the response text as the model produces it; the full result is
+    cached once the stream completes (never a partial one). If the same
+    analysis is already in flight, wait for it and replay its result instead.
+    A consumer that stops early doesn't abort the model call: it is finished
+    in the background for the callers waiting on it.
+    """
+    call, leader = analysis_flight.acquire(cache_key)
+    if not leader:
+        try:
+            result = call.wait()
+        except AnalysisError:
+            raise
+        except Exception as e:
+            raise AnalysisError(f"Analysis failed: {str(e)}")
+        yield from _replay(result)
+        return
+
+    parts = []
+    result = None
+    error = None
+    handed_off = False
+    try:
+        cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+        if cached is not None:
+            result = cached
+            yield from _replay(cached)
+            return
+        stream = gateway.generate_stream(MODEL_NAME, prompt, **options)
+        with span("llm.stream"):
+            for text in stream:
+                parts.append(text)
+                yield text
+        result = "".join(parts)
+        if cacheable:
+            cache.set(ANALYSIS_NAMESPACE, cache_key, result)
+    except GeneratorExit:
+        if result is None:
+            # The client went away mid-stream. Finish the generation anyway, so
+            # coalesced callers (and a reconnecting client, via the cache) get it
+            threading.Thread(target=_finish_stream, args=(cache_key, call, stream, parts, cacheable),
+                             name="analysis-stream-finish", daemon=True).start()
+            handed_off = True
+        raise
+    except LLMError as e:
+        error = _llm_failure(e)
+        raise error
+    except AnalysisError as e:
+        error = e
+        raise
     except Exception as e:
-        logger.error(f"Batch analysis failed: {e}")
-        return json.dumps({
-            "confidence_score": 50,
-            "sentiment": "Error",
-            "summary": f"Analysis failed: {str(e)}"
-        })
+        error = AnalysisError(f"Analysis failed: {str(e)}")
+        raise
+    finally:
+        if not handed_off:
+            analysis_flight.release(cache_key, call, result=result, error=error)
+
+
+def _finish_stream(cache_key: str, call, stream, parts: list, cacheable: bool):
+    """
+    Drain a model stream whose consumer left, cache the result and release
+    the callers waiting on it.
+    """
+    result = None
+    error = None
+    try:
+        parts.extend(stream)
+        result = "".join(parts)
+        if cacheable:
+            cache.set(ANALYSIS_NAMESPACE, cache_key, result)
+    except LLMError as e:
+        error = _llm_failure(e)
+    except Exception as e:
+        logger.exception("Finishing an abandoned analysis stream failed")
+        error = AnalysisError(f"Analysis failed: {str(e)}")
+    finally:
+        analysis_flight.release(cache_key, call, result=result, error=error)
+
+
+# Cached results are replayed through the stream in pieces of this size
+REPLAY_CHUNK_CHARS = 2048
+
+def _replay(result: str):
+    for i in range(0, len(result), REPLAY_CHUNK_CHARS):
+        yield result[i:i + REPLAY_CHUNK_CHARS]
+
+
+@traced("prompt.filing")
+def _filing_request(ticker: str, form_type: str, text_content: str, max_chars: int = FILING_MAX_CHARS):
+    """
+    Cache key and prompt for a single-filing analysis.
+    """
+    # Key includes ticker, form, and a hash of the full content (plus model and prompt version).
+    # A smaller budget than usual is part of it too; the usual one keeps the keys it always had.
+    text_hash = hashlib.md5(text_content.encode('utf-8')).hexdigest()
+    budget = [max_chars] if max_chars != FILING_MAX_CHARS else []
+    cache_key = get_cache_key("filing", FILING_PROMPT, SECTIONS_VERSION, ticker, form_type, text_hash, *budget)
+    cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+    if cached is not None:
+        logger.info(f"Analysis cache hit for {ticker} {form_type}")
+        return cache_key, None, cached
+
+    # Only the sections that matter for this form (e.g. Risk Factors and MD&A), not the cover page
+    content = select_sections(text_content, form_type, max_chars, text_hash=text_hash)
+    prompt = FILING_PROMPT.format(ticker=ticker, form_type=form_type, content=content)
+    return cache_key, prompt, None
+
+
+def analyze_filing(ticker: str, form_type: str, text_content: str, max_chars: int = FILING_MAX_CHARS) -> str:
+    """
+    Analyze the text of a filing using Gemini 3 (or latest available).
+    max_chars: filing text budget for the prompt.
+    Returns a markdown summary/analysis. Raises AnalysisError.
+    """
+    _require_client()
+
+    if not text_content:
+        raise AnalysisError("No content to analyze.", status_code=400)
+
+    cache_key, prompt, cached = _filing_request(ticker, form_type, text_content, max_chars)
+    if cached is not None:
+        return cached
+
+    return _generate(cache_key, prompt, {"temperature": 0.2})
+
+
+def stream_filing_analysis(ticker: str, form_type: str, text_content: str):
+    """
+    Same as analyze_filing, yielding the markdown as it is generated.
+    Cache hits are replayed through the same interface. Raises AnalysisError.
+    """
+    _require_client()
+
+    if not text_content:
+        raise AnalysisError("No content to analyze.", status_code=400)
+
+    cache_key, prompt, cached = _filing_request(ticker, form_type, text_content)
+    if cached is not None:
+        yield from _replay(cached)
+        return
+    yield from _generate_stream(cache_key, prompt, {"temperature": 0.2})
+
+
+@traced("prompt.company")
+def _company_request(ticker: str, filings_list: list):
+    """
+    Cache key and prompt for the single-prompt comprehensive analysis.
+    """
+    # Generate cache key based on the list of accession numbers (identifies the exact set of docs)
+    # Sort by date usually, but for hash order matters.
+    accession_ids = sorted([f.get('accessionNumber', '') for f in filings_list])
+    cache_key = get_cache_key("comprehensive", COMPANY_PROMPT, SECTIONS_VERSION, PLANNER_VERSION,
+                              COMPANY_TOKEN_BUDGET, ticker, json.dumps(accession_ids))
+    cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+    if cached is not None:
+        logger.info(f"Comprehensive analysis cache hit for {ticker} ({cache_key})")
+        return cache_key, None, cached
+
+    # Construct Prompt
+    # The token budget is shared by priority: the 10-K (foundation) first,
+    # then the 10-Qs/8-Ks since, newest first. Short filings go in whole.
+    plan = plan_budget(filings_list, COMPANY_TOKEN_BUDGET)
+    _record_plan("company", ticker, plan)
+
+    combined_text = f"Comprehensive Analysis Context for {ticker}:\n\n"
+    
+    for filing, entry in zip(filings_list, plan['documents']):
+        form = filing['form']
+        date = filing['filingDate']
+        content = select_sections(filing.get('content', ''), form, tokens_to_chars(entry['allotted']))
+        
+        combined_text += f"---\nDOCUMENT: {form} (Filed: {date})\nCONTENT:\n{content}\n---\n\n"
+
+    prompt = COMPANY_PROMPT.format(ticker=ticker, combined_text=combined_text)
+    return cache_key, prompt, None
+
+
+def _map_filings(ticker: str, filings_list: list) -> list:
+    """
+    Map step: analyze each filing on its own, in parallel, through analyze_filing's
+    cache, so any filing is only ever analyzed once. The prompts share MAP_TOKEN_BUDGET
+    (the 10-K first, then newest first); a filing whose share covers it whole gets
+    the usual budget, so its notes are the ones a single-filing analysis caches.
+    Returns the filings with their notes as content, leaving out the ones that failed.
+    """
+    plan = plan_budget([dict(f, content=f.get('content', '')[:FILING_MAX_CHARS]) for f in filings_list],
+                       MAP_TOKEN_BUDGET)
+    _record_plan("map", ticker, plan)
+
+    def map_one(filing, entry):
+        max_chars = FILING_MAX_CHARS if entry['whole'] else tokens_to_chars(entry['allotted'])
+        try:
+            return analyze_filing(ticker, filing['form'], filing.get('content', ''), max_chars)
+        except AnalysisError as e:
+            return e
+
+    workers = max(1, min(ANALYSIS_WORKERS, len(filings_list)))
+    with span("analysis.map"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-map") as pool:
+        # Each task gets a copy of our context, so its spans are reported with the request's
+        futures = [pool.submit(contextvars.copy_context().run, map_one, f, entry)
+                   for f, entry in zip(filings_list, plan['documents'])]
+        notes = [future.result() for future in futures]
+
+    documents = [dict(f, content=n) for f, n in zip(filings_list, notes) if not isinstance(n, AnalysisError)]
+    if not documents:
+        raise AnalysisError(f"Comprehensive analysis failed: {notes[0]}", status_code=notes[0].status_code)
+    if len(documents) < len(filings_list):
+        logger.warning(f"{len(filings_list) - len(documents)} of {len(filings_list)} filings failed to analyze for {ticker}")
+    return documents
+
+
+@traced("prompt.reduce")
+def _reduce_request(ticker: str, documents: list):
+    """
+    Cache key and prompt for the reduce step over per-filing notes.
+    """
+    # Keyed by the notes themselves: the same set of per-filing results reduces once
+    notes_key = make_key(*[json.dumps([d['form'], d['filingDate'], d['content']]) for d in documents])
+    cache_key = get_cache_key("reduce", REDUCE_PROMPT, PLANNER_VERSION, COMPANY_TOKEN_BUDGET, ticker, notes_key)
+    cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+    if cached is not None:
+        logger.info(f"Comprehensive analysis cache hit for {ticker} ({cache_key})")
+        return cache_key, None, cached
+
+    plan = plan_budget(documents, COMPANY_TOKEN_BUDGET)
+    _record_plan("reduce", ticker, plan)
+
+    combined_text = ""
+    for document, entry in zip(documents, plan['documents']):
+        content = document['content'][:tokens_to_chars(entry['allotted'])]
+        combined_text += f"---\nNOTES ON: {document['form']} (Filed: {document['filingDate']})\n{content}\n---\n\n"
+
+    prompt = REDUCE_PROMPT.format(ticker=ticker, combined_text=combined_text)
+    return cache_key, prompt, None
+
+
+def _company_plan(ticker: str, filings_list: list, mode: str):
+    """
+    (cache_key, prompt, cached, cacheable) for a comprehensive analysis in either mode.
+    In map_reduce mode this runs the map step; a report missing a failed filing is not cached.
+    """
+    if mode == "map_reduce":
+        documents = _map_filings(ticker, filings_list)
+        return _reduce_request(ticker, documents) + (len(documents) == len(filings_list),)
+    return _company_request(ticker, filings_list) + (True,)
+
+
+def analyze_company_comprehensive(ticker: str, filings_list: list, mode: str = COMPANY_ANALYSIS_MODE) -> str:
+    """
+    Analyze a collection of filings (10-K, 10-Q, 8-K) to produce a comprehensive report.
+    filings_list: list of dicts { 'form': str, 'filingDate': str, 'content': str, 'accessionNumber': str }
+    mode "map_reduce" summarises each filing once and combines the summaries, so a new 8-K
+    costs one map call plus one small reduce call; "single" sends all filings in one prompt.
+    Raises AnalysisError.
+    """
+    _require_client()
+
+    if not filings_list:
+        raise AnalysisError("No filings provided for analysis.", status_code=400)
+
+    cache_key, prompt, cached, cacheable = _company_plan(ticker, filings_list, mode)
+    if cached is not None:
+        return cached
+
+    return _generate(cache_key, prompt, {"temperature": 0.3}, cacheable)
+
+
+def stream_company_analysis(ticker: str, filings_list: list, mode: str = COMPANY_ANALYSIS_MODE):
+    """
+    Same as analyze_company_comprehensive, yielding the report as it is generated
+    (in map_reduce mode, once the map step is done). Raises AnalysisError.
+    """
+    _require_client()
+
+    if not filings_list:
+        raise AnalysisError("No filings provided for analysis.", status_code=400)
+
+    cache_key, prompt, cached, cacheable = _company_plan(ticker, filings_list, mode)
+    if cached is not None:
+        yield from _replay(cached)
+        return
+    yield from _generate_stream(cache_key, prompt, {"temperature": 0.3}, cacheable)
+
+
+def analyze_filings_batch(ticker: str, filings_list: list) -> str:
+    """
+    Analyze a batch of filings (e.g., multiple Form 4s from the same day).
+    filings_list: list of dicts { 'form': str, 'filingDate': str, 'content': str, 'accessionNumber': str }
+    Form 4s may carry 'ownership' (see scraper.fetch_ownership) instead of content: those are
+    sent as a compact transaction table, and batches of only routine activity skip the LLM.
+    Returns the model's JSON. Raises AnalysisError.
+    """
+    if not filings_list:
+        raise AnalysisError("No filings provided for analysis.", status_code=400)
+
+    parsed = [f for f in filings_list if f.get('ownership')]
+    transactions = [t for f in parsed for t in f['ownership']['transactions']]
+    metrics = insider_metrics(transactions) if parsed else None
+    if metrics and metrics['routine_only'] and len(parsed) == len(filings_list):
+        logger.info(f"Routine-only insider batch for {ticker}, skipping LLM")
+        return json.dumps(routine_result(metrics))
+
+    _require_client()
+
+    # Generate cache key
+    accession_ids = sorted([f.get('accessionNumber', '') for f in filings_list])
+    cache_key = get_cache_key("batch", BATCH_PROMPT, FORM4_VERSION, PLANNER_VERSION, BATCH_TOKEN_BUDGET,
+                              ticker, json.dumps(accession_ids))
+    cached = cache.get(ANALYSIS_NAMESPACE, cache_key)
+    if cached is not None:
+        logger.info(f"Batch analysis cache hit for {ticker}")
+        return cached
+
+    # Construct Prompt
+    with span("prompt.batch"):
+        combined_text = f"Batch Analysis Context for {ticker}:\n\n"
+        form_type = filings_list[0]['form'] if filings_list else "Filings"
+
+        if parsed:
+            combined_text += (
+                f"INSIDER TRANSACTIONS ({len(parsed)} filings, parsed from the ownership XML):\n"
+                f"{format_transaction_table(transactions)}\n\n"
+                f"PRECOMPUTED METRICS (open-market trades only):\n{json.dumps(metrics, indent=1)}\n\n"
+            )
+
+        # Filings we couldn't parse go in as text, sharing what the table left of the budget
+        text_filings = [f for f in filings_list if not f.get('ownership')]
+        if text_filings:
+            plan = plan_budget(text_filings, BATCH_TOKEN_BUDGET - count_tokens(combined_text), foundation=False)
+            _record_plan("batch", ticker, plan)
+            for filing, entry in zip(text_filings, plan['documents']):
+                form = filing['form']
+                date = filing['filingDate']
+                content = filing.get('content', '')[:tokens_to_chars(entry['allotted'])]
+
+                combined_text += f"---\nDOCUMENT: {form} (Filed: {date})\nACCESSION: {filing.get('accessionNumber')}\nCONTENT:\n{content}\n---\n\n"
+
+        prompt = BATCH_PROMPT.format(ticker=ticker, form_type=form_type, combined_text=combined_text)
+    options = {"temperature": 0.1, "json_output": True}
+    # json.JSONDecodeError is a ValueError: a truncated or non-JSON answer isn't cached
+    return _generate(cache_key, prompt, options, validate=json.loads)
@@ -0,0 +1,275 @@
+"""
+Bulk backfill of filing metadata from EDGAR's bulk archives on disk.
+
+Reads submissions.zip (https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip)
+and/or the quarterly full-index master files (full-index/{year}/QTR{n}/master.idx,
+.gz or .zip, as downloaded or from a local mirror), parses them in a process
+pool and loads the filings of every tracked CIK into the local filing store.
+Optionally pre-fetches and extracts the documents of chosen forms into the cache.
+
+Work is checkpointed per zip member / index file (and CIK set) in the same transaction as its
+rows, so an interrupted run picks up where it stopped. Run from backend/:
+
+    python backfill.py --submissions ~/edgar/submissions.zip --full-index ~/edgar/full-index --years 2023 2024
+    python backfill.py --submissions ~/edgar/submissions.zip --tickers-file watchlist.txt --track \\
+        --prefetch-forms 10-K 10-Q 4 --prefetch-since 2024-01-01
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from edgar_index import parse_master_index
+from filing_store import FilingStore, filing_row
+
+logger = logging.getLogger(__name__)
+
+# Zip members per task: big enough to amortise opening the archive, small enough to checkpoint often
+CHUNK_SIZE = 500
+SUBMISSIONS_MEMBER_RE = re.compile(r"^CIK(\d{10})(?:-submissions-\d+)?\.json$")
+INDEX_FILE_RE = re.compile(r"(\d{4})[/\\]QTR([1-4])[/\\]master\.(idx|gz|zip)$")
+SUBMISSIONS_COLUMNS = ("accessionNumber", "form", "filingDate", "reportDate", "primaryDocument")
+# Documents handed to the scraper per batch when pre-fetching
+PREFETCH_BATCH = 64
+
+
+def _fingerprint(path: str) -> str:
+    # A re-downloaded archive gets new checkpoints
+    stat = os.stat(path)
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+
+def parse_submissions_members(zip_path: str, members: list) -> list:
+    """
+    Worker: [(member, rows)] for submissions JSON members. The main document keeps
+    recent filings under filings.recent; the -submissions-NNN pages hold older
+    ones as top-level columns.
+    """
+    results = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            cik = SUBMISSIONS_MEMBER_RE.match(member).group(1)
+            data = json.loads(archive.read(member))
+            recent = data.get("filings", {}).get("recent", data)
+            columns = [recent.get(name, []) for name in SUBMISSIONS_COLUMNS]
+            rows = [filing_row(cik, accession, form, filing_date, report_date, primary_document)
+                    for accession, form, filing_date, report_date, primary_document in zip(*columns)]
+            results.append((member, rows))
+    return results
+
+
+def _read_index(path: str) -> str:
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            return f.read().decode("latin-1")
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return archive.read(archive.namelist()[0]).decode("latin-1")
+    with open(path, "rb") as f:
+        return f.read().decode("latin-1")
+
+
+def parse_index_file(path: str, ciks) -> list:
+    """
+    Worker: rows for a quarterly master index, only for `ciks` (None for all).
+    """
+    entries = parse_master_index(_read_index(path), ciks)
+    return [filing_row(e["cik"], e["accessionNumber"], e["form"], e["filingDate"]) for e in entries]
+
+
+def submissions_members(zip_path: str, ciks) -> list:
+    """
+    The zip's submissions documents for the wanted CIKs (None for all).
+    """
+    with zipfile.ZipFile(zip_path) as archive:
+        return [name for name in archive.namelist()
+                if (match := SUBMISSIONS_MEMBER_RE.match(name)) and (ciks is None or match.group(1) in ciks)]
+
+
+def index_files(root: str, years=None) -> list:
+    """
+    Quarterly master index files under a full-index directory, oldest first.
+    Where a quarter has several formats, the plain .idx wins.
+    """
+    quarters = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            match = INDEX_FILE_RE.search(path)
+            if not match or (years and int(match.group(1)) not in years):
+                continue
+            quarter = (int(match.group(1)), int(match.group(2)))
+            if quarter not in quarters or match.group(3) == "idx":
+                quarters[quarter] = path
+    return [quarters[q] for q in sorted(quarters)]
+
+
+class Progress:
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.filings = 0
+        self.started = time.perf_counter()
+
+    def add(self, units: int, filings: int):
+        self.done += units
+        self.filings += filings
+        elapsed = time.perf_counter() - self.started
+        print(f"{self.label}: {self.done}/{self.total} units, {self.filings} filings, "
+              f"{self.filings / elapsed if elapsed else 0:.0f} filings/s", flush=True)
+
+
+def backfill_submissions(store: FilingStore, pool, zip_path: str, ciks, chunk_size: int) -> int:
+    fingerprint = _fingerprint(zip_path)
+    completed = store.completed_units()
+    pending = [m for m in submissions_members(zip_path, ciks) if f"submissions:{fingerprint}:{m}" not in completed]
+    progress = Progress("submissions", len(pending))
+    futures = [pool.submit(parse_submissions_members, zip_path, pending[i:i + chunk_size])
+               for i in range(0, len(pending), chunk_size)]
+    for future in as_completed(futures):
+        results = future.result()
+        rows = [row for _, member_rows in results for row in member_rows]
+        store.upsert(rows, [(f"submissions:{fingerprint}:{member}", len(member_rows)) for member, member_rows in results])
+        progress.add(len(results), len(rows))
+    return progress.filings
+
+
+def _cik_scope(ciks) -> str:
+    """
+    Stable name for the CIK filter an index file was loaded with: an index
+    checkpoint only covers the CIKs it was parsed for.
+    """
+    if ciks is None:
+        return "all"
+    return hashlib.sha1(",".join(sorted(ciks)).encode()).hexdigest()[:16]
+
+
+def backfill_index(store: FilingStore, pool, root: str, ciks, years) -> int:
+    completed = store.completed_units()
+    scope = _cik_scope(ciks)
+    units = {}
+    for path in index_files(root, years):
+        base = f"index:{os.path.relpath(path, root)}:{_fingerprint(path)}"
+        # A file loaded for every CIK covers any later subset
+        if f"{base}:all" not in completed:
+            units[f"{base}:{scope}"] = path
+    pending = {unit: path for unit, path in units.items() if unit not in completed}
+    progress = Progress("full-index", len(pending))
+    futures = {pool.submit(parse_index_file, path, ciks): unit for unit, path in pending.items()}
+    for future in as_completed(futures):
+        rows = future.result()
+        store.upsert(rows, [(futures[future], len(rows))])
+        progress.add(1, len(rows))
+    return progress.filings
+
+
+def prefetch(store: FilingStore, ciks, forms: list, since: str = None):
+    """
+    Fetch and extract documents into the cache (already cached ones are cache hits,
+    so a re-run only fetches what's missing). Filings only seen in a master index
+    have no primary document and are skipped.
+    """
+    from scraper import filing_url, get_filing_texts, get_ownerships, text_budget
+
+    filings = store.filings(ciks=ciks, forms=forms, since=since)
+    documents = [f for f in filings if f["primaryDocument"]]
+    print(f"prefetch: {len(documents)} documents ({len(filings) - len(documents)} without a primary document)")
+    started = time.perf_counter()
+    done = failed = 0
+    for i in range(0, len(documents), PREFETCH_BATCH):
+        batch = documents[i:i + PREFETCH_BATCH]
+        urls = [filing_url(f["cik"], f["accessionNumber"], f["primaryDocument"]) for f in batch]
+        ownership = [f["form"].split("/")[0] in ("3", "4", "5") for f in batch]
+        results = get_ownerships([u for u, o in zip(urls, ownership) if o])
+        results += get_filing_texts([u for u, o in zip(urls, ownership) if not o],
+                                    max_chars=[text_budget(f["form"]) for f, o in zip(batch, ownership) if not o])
+        done += len(results)
+        failed += sum(1 for r in results if r["error"])
+        elapsed = time.perf_counter() - started
+        print(f"prefetch: {done}/{len(documents)} documents, {failed} failed, "
+              f"{done / elapsed if elapsed else 0:.1f} docs/s", flush=True)
+
+
+def tracked_ciks(args) -> dict:
+    """
+    { cik: ticker } for the monitor's watchlist plus any tickers given.
+    """
+    from monitor_store import MonitorStore
+    monitor_store = MonitorStore()
+    tracked, _, _ = monitor_store.load()
+    ciks = {cik: ticker for ticker, cik in tracked.items() if cik}
+
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    if tickers:
+        from scraper import get_cik
+        for ticker in tickers:
+            cik = get_cik(ticker)
+            if not cik:
+                print(f"Skipping unknown ticker {ticker}")
+                continue
+            ciks[cik] = ticker
+            if args.track:
+                monitor_store.add_ticker(ticker, cik)
+    monitor_store.close()
+    return ciks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", help="path to submissions.zip")
+    parser.add_argument("--full-index", help="full-index directory ({year}/QTR{n}/master.idx)")
+    parser.add_argument("--years", type=int, nargs="+", help="only these years of the full index")
+    parser.add_argument("--tickers", nargs="+", type=str.upper, help="tickers to load besides the watchlist")
+    parser.add_argument("--tickers-file", help="file with one ticker per line")
+    parser.add_argument("--track", action="store_true", help="also add the given tickers to the watchlist")
+    parser.add_argument("--all-ciks", action="store_true", help="load every company, not just tracked ones")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parser processes")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="zip members per task")
+    parser.add_argument("--prefetch-forms", nargs="+", help="fetch and extract documents of these forms")
+    parser.add_argument("--prefetch-since", help="only prefetch filings from this date (YYYY-MM-DD)")
+    parser.add_argument("--restart", action="store_true", help="ignore checkpoints from earlier runs")
+    args = parser.parse_args()
+
+    if not args.submissions and not args.full_index and not args.prefetch_forms:
+        parser.error("nothing to do: give --submissions, --full-index and/or --prefetch-forms")
+
+    logging.basicConfig(level=logging.WARNING)
+    ciks = None
+    if not args.all_ciks:
+        ciks = set(tracked_ciks(args))
+        if not ciks:
+            parser.error("no tracked tickers: give --tickers/--tickers-file or --all-ciks")
+        print(f"Backfilling {len(ciks)} CIKs")
+
+    store = FilingStore()
+    if args.restart:
+        store.clear_checkpoints()
+
+    started = time.perf_counter()
+    loaded = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.submissions:
+            loaded += backfill_submissions(store, pool, args.submissions, ciks, args.chunk_size)
+        if args.full_index:
+            loaded += backfill_index(store, pool, args.full_index, ciks, set(args.years or []))
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {loaded} filings in {elapsed:.1f}s ({loaded / elapsed if elapsed else 0:.0f} filings/s); "
+          f"{len(store)} in {store.path}")
+
+    if args.prefetch_forms:
+        prefetch(store, ciks, args.prefetch_forms, args.prefetch_since)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
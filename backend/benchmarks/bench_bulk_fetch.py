@@ -0,0 +1,81 @@
+"""
+Wall-clock time of sequential vs. concurrent filing retrieval.
+
+Replaces the EDGAR client's HTTP session with a stand-in that sleeps for a
+fixed latency, so the numbers reflect round trips and the global rate
+limiter rather than SEC's mood. Run from backend/:
+
+    python benchmarks/bench_bulk_fetch.py --latency 0.3 --counts 1 5 10 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import scraper
+from cache_store import CacheStore
+from edgar_client import edgar
+
+HTML = b"<html><body><p>Item 1. Business</p><p>" + b"Lorem ipsum dolor sit amet. " * 2000 + b"</p></body></html>"
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    content = HTML
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, url, **kwargs):
+        time.sleep(self.latency)
+        return FakeResponse()
+
+
+def run(count: int, concurrent: bool) -> float:
+    # Fresh cache per run so every URL is a miss
+    scraper.cache = CacheStore(os.path.join(tempfile.mkdtemp(prefix="bench_fetch_"), "cache.db"))
+    urls = [f"https://www.sec.gov/Archives/edgar/data/1/{i:018d}/doc.htm" for i in range(count)]
+    start = time.perf_counter()
+    if concurrent:
+        scraper.get_filing_texts(urls)
+    else:
+        for url in urls:
+            scraper.get_filing_text(url)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated seconds per request")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    edgar.session = FakeSession(args.latency)
+
+    print(f"latency={args.latency}s rate_limit={edgar.limiter.rate}/s workers={scraper.FETCH_WORKERS}")
+    print(f"{'filings':>8} {'sequential':>12} {'concurrent':>12} {'speedup':>8}")
+    for count in args.counts:
+        sequential = run(count, concurrent=False)
+        concurrent = run(count, concurrent=True)
+        print(f"{count:>8} {sequential:>11.2f}s {concurrent:>11.2f}s {sequential / concurrent:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
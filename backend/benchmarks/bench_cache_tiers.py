@@ -0,0 +1,73 @@
+"""
+Latency of cache lookups: memory-tier hit vs. SQLite hit vs. miss.
+
+Uses a throwaway cache file and report-sized values. Run from backend/:
+
+    python benchmarks/bench_cache_tiers.py --entries 200 --size 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from cache_store import CacheStore, make_key
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def measure(fn, keys: list) -> list:
+    samples = []
+    for key in keys:
+        start = time.perf_counter()
+        fn(key)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200)
+    parser.add_argument("--size", type=int, default=20000, help="characters per cached value")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_cache_"), "cache.db")
+    store = CacheStore(path)
+    words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(2, 10))) for _ in range(500)]
+    keys = [make_key("bench", i) for i in range(args.entries)]
+    for key in keys:
+        store.set("bench", key, " ".join(random.choices(words, k=args.size // 6))[:args.size])
+
+    # Warm the memory tier, then measure it
+    for key in keys:
+        store.get("bench", key)
+    memory = measure(lambda k: store.get("bench", k), keys)
+
+    # Same keys with the memory tier emptied, so every lookup reads and decompresses from SQLite
+    def disk_get(k):
+        store.memory.clear()
+        store.get("bench", k)
+    disk = measure(disk_get, keys)
+
+    missing = [make_key("missing", i) for i in range(args.entries)]
+    miss = measure(lambda k: store.get("bench", k), missing)
+
+    print(f"entries={args.entries} value_size={args.size} chars")
+    print(f"{'path':>12} {'p50 (us)':>10} {'p95 (us)':>10} {'mean (us)':>10}")
+    for name, samples in (("memory hit", memory), ("disk hit", disk), ("miss", miss)):
+        print(f"{name:>12} {percentile(samples, 0.5):>10.1f} {percentile(samples, 0.95):>10.1f} "
+              f"{statistics.mean(samples):>10.1f}")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+End-to-end latency, throughput and peak RSS against recorded EDGAR responses.
+
+Starts the EDGAR stand-in (edgar_standin.py) and the API (uvicorn main:app) as
+subprocesses, with a throwaway cache, monitor database and ticker snapshot, and
+the fake LLM backend and price source. Library scenarios (get_cik, get_recent_filings,
+get_filing_text, the analyzer prompt builders and cache paths, Form 4 parsing)
+run in this process; every endpoint is then driven over HTTP at the given
+concurrency. Reports p50/p95/p99 latency, ops/sec and peak RSS per scenario.
+
+Results can be saved as a baseline and later runs compared against it; a p95
+or throughput or peak RSS worse than the baseline by more than --tolerance is
+flagged and the exit status is 1. benchmarks/baselines/e2e.json was recorded
+with the defaults below against the stand-in; baselines are machine-specific,
+so re-record it (--save-baseline) on the machine that compares against it.
+Run from backend/:
+
+    python benchmarks/bench_e2e.py --save-baseline
+    python benchmarks/bench_e2e.py --requests 100 --concurrency 16
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Add backend to path
+sys.path.append(BACKEND_DIR)
+
+from edgar_standin import install
+from fixtures import COMPANIES
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "e2e.json")
+# Relative slack before a scenario counts as a regression
+TOLERANCE = 0.25
+# ...and absolute slack, so sub-millisecond scenarios don't flag on scheduler noise
+MIN_DELTA_MS = 10.0
+JOB_POLL_SECONDS = 0.02
+STARTUP_TIMEOUT = 60
+
+
+def configure(workdir: str, llm_latency_ms: float) -> dict:
+    """
+    Environment for this process and the API: isolated state, offline LLM,
+    no monitor ticks during the run.
+    """
+    env = {
+        "CACHE_DB_PATH": os.path.join(workdir, "cache.db"),
+        "MONITOR_DB_PATH": os.path.join(workdir, "monitor.db"),
+        "TICKER_SNAPSHOT_PATH": os.path.join(workdir, "company_tickers.json"),
+        "PRICE_STORE_DIR": os.path.join(workdir, "prices"),
+        "FILING_DB_PATH": os.path.join(workdir, "filings.db"),
+        "PRICE_SOURCE": "fake",
+        "MONITOR_POLL_SECONDS": "86400",
+        "LLM_BACKEND": "fake",
+        "LLM_FAKE_LATENCY_MS": str(llm_latency_ms),
+        "LLM_FAKE_JITTER_MS": "0",
+        "LLM_MAX_QPS": "1000",
+        "GEMINI_API_KEY": "",
+    }
+    os.environ.update(env)
+    return env
+
+
+# --- Measurement -----------------------------------------------------------
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def reset_peak_rss(pid="self"):
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+); without it peaks only grow
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb(pid="self") -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def measure(operation, count: int, concurrency: int, pid="self") -> dict:
+    """
+    Run operation(i) for i in range(count) on `concurrency` threads.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def run_one(i):
+        start = time.perf_counter()
+        try:
+            operation(i)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    reset_peak_rss(pid)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run_one, range(count)))
+    wall = time.perf_counter() - start
+    result = {
+        "count": count,
+        "errors": len(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "ops_per_sec": len(latencies) / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(pid),
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+# --- Library scenarios -----------------------------------------------------
+
+def library_scenarios(filings: list) -> dict:
+    """
+    { name: (setup, operation) }. setup() runs once before timing; operations
+    take the request index. "cold" variants drop the relevant cache entry first.
+    """
+    import analyzer
+    import scraper
+    from cache_store import cache, make_key
+    from form4 import insider_metrics, parse_ownership_xml
+    from fixtures import ensure_fixtures
+
+    tickers = [ticker for ticker, _, _ in COMPANIES]
+    by_form = {}
+    for f in filings:
+        by_form.setdefault(f["form"], []).append(f)
+    current, periodic = by_form["8-K"], by_form["10-K"] + by_form["10-Q"]
+    texts = [scraper.get_filing_text(f["url"]) for f in current[:4]]
+    documents = [{"form": f["form"], "filingDate": f["filingDate"], "accessionNumber": f["accessionNumber"],
+                  "content": text} for f, text in zip(current, texts)]
+    with open(ensure_fixtures()["form4.xml"], "rb") as fh:
+        ownership_xml = fh.read()
+
+    def text_cold(filing, max_chars):
+        cache.delete(scraper.FILING_TEXT_NAMESPACE, make_key(scraper.FILING_TEXT_VERSION, max_chars, filing["url"]))
+        scraper.fetch_filing_text(filing["url"], max_chars)
+
+    def recent_cold(i):
+        ticker = tickers[i % len(tickers)]
+        scraper.submissions_cache.invalidate(scraper.get_cik(ticker))
+        scraper.get_recent_filings(ticker, limit=100)
+
+    def warm_analysis():
+        analyzer.analyze_filing(tickers[0], "8-K", texts[0])
+
+    return {
+        "get_cik": (None, lambda i: scraper.get_cik(tickers[i % len(tickers)])),
+        "get_recent_filings (cold)": (None, recent_cold),
+        "get_recent_filings (warm)": (None, lambda i: scraper.get_recent_filings(tickers[i % len(tickers)], limit=100)),
+        "get_filing_text 8-K (cold)": (None, lambda i: text_cold(current[i % len(current)], scraper.MAX_CHARS)),
+        "get_filing_text 8-K (warm)": (None, lambda i: scraper.get_filing_text(current[i % len(current)]["url"])),
+        "get_filing_text 10-K/Q (cold)": (None, lambda i: text_cold(periodic[i % len(periodic)],
+                                                                      scraper.PERIODIC_MAX_CHARS)),
+        "prompt: filing": (None, lambda i: analyzer._filing_request(tickers[0], "8-K", texts[i % len(texts)] + str(i))),
+        "prompt: company": (None, lambda i: analyzer._company_request(tickers[0], documents[:1 + i % len(documents)])),
+        "prompt: reduce": (None, lambda i: analyzer._reduce_request(tickers[0], documents[:1 + i % len(documents)])),
+        "analysis cache hit": (warm_analysis, lambda i: analyzer.analyze_filing(tickers[0], "8-K", texts[0])),
+        "form4 parse + metrics": (None, lambda i: insider_metrics(parse_ownership_xml(ownership_xml)["transactions"])),
+    }
+
+
+# --- Endpoint scenarios ----------------------------------------------------
+
+class Api:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # One keep-alive connection per load thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        response = self.session.get(self.base_url + path, timeout=120, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        response = self.session.post(self.base_url + path, timeout=120, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def job(self, path: str, **kwargs) -> dict:
+        """
+        Submit an analysis job and poll it until it finishes.
+        """
+        job_id = self.post(path, **kwargs).json()["job_id"]
+        while True:
+            job = self.get(f"/api/jobs/{job_id}").json()
+            if job["status"] == "done":
+                return job
+            if job["status"] == "failed":
+                raise RuntimeError(job["error"])
+            time.sleep(JOB_POLL_SECONDS)
+
+    def stream(self, path: str, first_event_only: bool = False, **kwargs) -> str:
+        """
+        Read an SSE stream to its done event (or only up to the first event).
+        """
+        with self.session.get(self.base_url + path, stream=True, timeout=120, **kwargs) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if first_event_only and not line:
+                    return line
+                if line.startswith("event: error"):
+                    raise RuntimeError("stream ended with an error event")
+                if line.startswith("event: done"):
+                    return line
+        raise RuntimeError("stream ended without a done event")
+
+
+def endpoint_scenarios(api: Api, filings: list) -> dict:
+    tickers = [ticker for ticker, _, _ in COMPANIES]
+    current = [f for f in filings if f["form"] == "8-K"]
+    insider = [f for f in filings if f["form"] == "4"]
+    finished = {}
+
+    def analyze(i):
+        f = current[i % len(current)]
+        api.job("/api/analyze", params={"url": f["url"], "ticker": f["ticker"], "form": f["form"]})
+
+    def batch(i):
+        chosen = [insider[(i + k) % len(insider)] for k in range(5)]
+        api.job("/api/analyze-batch", json={"ticker": chosen[0]["ticker"], "filings": [
+            {key: f[key] for key in ("url", "form", "filingDate", "accessionNumber")} for f in chosen]})
+
+    def job_status(i):
+        if "id" not in finished:
+            finished["id"] = api.post("/api/analyze", params={"url": current[0]["url"], "ticker": tickers[0],
+                                                              "form": "8-K"}).json()["job_id"]
+        api.get(f"/api/jobs/{finished['id']}")
+
+    def stream_filing(i):
+        f = current[i % len(current)]
+        api.stream("/api/analyze/stream", params={"url": f["url"], "ticker": f["ticker"], "form": f["form"]})
+
+    return {
+        "GET /": lambda i: api.get("/"),
+        "POST /api/track": lambda i: api.post("/api/track", json={"ticker": tickers[i % len(tickers)]}),
+        "GET /api/tracked": lambda i: api.get("/api/tracked"),
+        "GET /api/feed": lambda i: api.get("/api/feed", params={"limit": 50}),
+        "GET /api/filings": lambda i: api.get("/api/filings", params={
+            "ticker": tickers[i % len(tickers)], "forms": ("10-K", "8-K", "4")[i % 3]}),
+        "GET /api/feed/stream (first event)": lambda i: api.stream("/api/feed/stream", first_event_only=True),
+        "GET /api/stats": lambda i: api.get("/api/stats"),
+        "POST /api/analyze (job)": analyze,
+        "GET /api/jobs/{id}": job_status,
+        "POST /api/analyze-batch (job)": batch,
+        "POST /api/analyze-company (job)": lambda i: api.job("/api/analyze-company",
+                                                            json={"ticker": tickers[i % len(tickers)]}),
+        "GET /api/analyze/stream": stream_filing,
+        "GET /api/analyze-company/stream": lambda i: api.stream("/api/analyze-company/stream",
+                                                                params={"ticker": tickers[i % len(tickers)]}),
+        "GET /api/stock-history": lambda i: api.get("/api/stock-history", params={
+            "ticker": tickers[i % len(tickers)], "period": ("1mo", "1y", "5y")[i % 3]}),
+    }
+
+
+# --- Processes ---------------------------------------------------------------
+
+def start_standin(latency: float):
+    process = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), "edgar_standin.py"),
+                                "--latency", str(latency)], stdout=subprocess.PIPE, text=True)
+    port = int(process.stdout.readline())
+    return process, f"http://127.0.0.1:{port}"
+
+
+def start_api(env: dict, standin_url: str, port: int):
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-api", str(port), standin_url],
+                               cwd=BACKEND_DIR, env=dict(os.environ, **env))
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API exited during startup")
+        try:
+            requests.get(base_url + "/", timeout=1)
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("API did not start")
+
+
+def serve_api(port: int, standin_url: str):
+    import uvicorn
+    install(standin_url)
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- Reporting ---------------------------------------------------------------
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Regressions as "scenario: metric old -> new" strings.
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        checks = [("p95_ms", result["p95_ms"] > max(old["p95_ms"] * (1 + tolerance), old["p95_ms"] + MIN_DELTA_MS)),
+                  # Throughput as wall time per operation, with the same absolute slack
+                  ("ops_per_sec", result["ops_per_sec"] < old["ops_per_sec"] / (1 + tolerance)
+                   and 1000 / result["ops_per_sec"] - 1000 / old["ops_per_sec"] > MIN_DELTA_MS)]
+        if result.get("peak_rss_mb") and old.get("peak_rss_mb"):
+            checks.append(("peak_rss_mb", result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance)))
+        for metric, worse in checks:
+            if worse:
+                regressions.append(f"{name}: {metric} {old[metric]:.1f} -> {result[metric]:.1f}")
+        if result["errors"] > old.get("errors", 0):
+            regressions.append(f"{name}: errors {old.get('errors', 0)} -> {result['errors']} ({result.get('first_error')})")
+    return regressions
+
+
+def run_settings(args) -> dict:
+    """
+    The parameters a baseline is only valid for.
+    """
+    return {"requests": args.requests, "concurrency": args.concurrency,
+            "edgar_latency": args.edgar_latency, "llm_latency_ms": args.llm_latency_ms}
+
+
+def print_row(name: str, result: dict):
+    rss = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "n/a"
+    print(f"{name:<38} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+          f"{result['ops_per_sec']:>9.1f} {rss:>9} {result['errors']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--serve-api", nargs=2, metavar=("PORT", "EDGAR_URL"), help=argparse.SUPPRESS)
+    parser.add_argument("--requests", type=int, default=50, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--edgar-latency", type=float, default=0.02, help="seconds per stand-in response")
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--only", help="run scenarios whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    if args.serve_api:
+        serve_api(int(args.serve_api[0]), args.serve_api[1])
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    env = configure(workdir, args.llm_latency_ms)
+    standin, standin_url = start_standin(args.edgar_latency)
+    api_process = None
+    try:
+        install(standin_url)
+        import scraper
+        # Per-request INFO logging would dominate the numbers
+        logging.getLogger().setLevel(logging.WARNING)
+        filings = [f for ticker, _, _ in COMPANIES for f in scraper.get_recent_filings(ticker, limit=100)]
+
+        print(f"requests={args.requests} concurrency={args.concurrency} edgar_latency={args.edgar_latency}s "
+              f"llm_latency={args.llm_latency_ms}ms filings={len(filings)}")
+        print(f"{'scenario':<38} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'peak RSS':>9} {'errors':>6}")
+        results = {}
+        for name, (setup, operation) in library_scenarios(filings).items():
+            if args.only and args.only not in name:
+                continue
+            if setup:
+                setup()
+            results[name] = measure(operation, args.requests, args.concurrency)
+            print_row(name, results[name])
+
+        api_process, base_url = start_api(env, standin_url, free_port())
+        api = Api(base_url)
+        # Warm the API's submissions cache, so a scenario's numbers don't depend on which ran before it
+        for ticker, _, _ in COMPANIES:
+            api.get("/api/filings", params={"ticker": ticker})
+        for name, operation in endpoint_scenarios(api, filings).items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = measure(operation, args.requests, args.concurrency, pid=api_process.pid)
+            print_row(name, results[name])
+    finally:
+        if api_process:
+            api_process.terminate()
+            api_process.wait()
+        standin.terminate()
+        standin.wait()
+
+    if args.save_baseline:
+        if args.only:
+            sys.exit("--save-baseline needs a full run, not --only")
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"settings": run_settings(args), "scenarios": results}, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if args.only:
+        # Scenarios warm caches for the ones after them, so a subset isn't comparable to a full run
+        print("NOTICE: partial run (--only), not compared against the baseline.")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"NOTICE: no baseline at {args.baseline}, nothing compared. "
+              "Record one on this machine with --save-baseline.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    # Numbers from a run with other settings aren't comparable, in either direction
+    settings = run_settings(args)
+    if baseline.get("settings") != settings:
+        print(f"NOTICE: baseline was recorded with {baseline.get('settings')}, this run used {settings}; "
+              "not compared. Re-run with the baseline's settings or record a new one with --save-baseline.")
+        return
+    baseline = baseline["scenarios"]
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f"NOTICE: not in the baseline, not compared: {', '.join(missing)}")
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+HTML-to-text extraction: BeautifulSoup tree (the old get_filing_text path) vs.
+the streaming extractor, on 10-K / 10-Q / 8-K / Form 4 fixtures.
+
+Each measurement runs in a fresh subprocess so peak RSS isn't polluted by
+earlier runs. Run from backend/:
+
+    python benchmarks/bench_extract.py
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fixtures import ensure_fixtures
+
+MAX_CHARS = 100000
+CHUNK_SIZE = 64 * 1024
+
+
+def extract_bs4(path: str) -> str:
+    import warnings
+    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+    # The old path fed Form 4 XML to the HTML parser too
+    warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+    with open(path, "rb") as f:
+        content = f.read()
+    soup = BeautifulSoup(content, 'lxml')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return soup.get_text(separator="\n", strip=True)[:MAX_CHARS]
+
+
+def extract_stream(path: str) -> str:
+    from text_extractor import extract_text
+    with open(path, "rb") as f:
+        return extract_text(iter(lambda: f.read(CHUNK_SIZE), b""), max_chars=MAX_CHARS)
+
+
+METHODS = {"bs4": extract_bs4, "stream": extract_stream}
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset on exec; ru_maxrss can carry over the parent's high-water mark
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(method: str, path: str):
+    # Import outside the measured region
+    if method == "bs4":
+        import bs4  # noqa: F401
+        import lxml  # noqa: F401
+    else:
+        import text_extractor  # noqa: F401
+    base_rss = peak_rss_mb()
+    start = time.perf_counter()
+    text = METHODS[method](path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_mb() - base_rss, "chars": len(text)}))
+
+
+def run(method: str, path: str) -> dict:
+    output = subprocess.check_output([sys.executable, __file__, "--worker", method, path])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--worker", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    fixtures = ensure_fixtures()
+    print(f"{'fixture':>10} {'size':>8} {'method':>7} {'time (s)':>9} {'extra RSS':>10} {'chars':>7}")
+    for name, path in fixtures.items():
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        for method in METHODS:
+            results = [run(method, path) for _ in range(args.repeat)]
+            best = min(results, key=lambda r: r["seconds"])
+            peak = max(r["peak_rss_mb"] for r in results)
+            print(f"{name:>10} {size_mb:>6.1f}MB {method:>7} {best['seconds']:>9.3f} {peak:>8.1f}MB {best['chars']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Local stand-in for the SEC endpoints the backend calls, serving the recorded
+(or generated) fixtures from fixtures.py.
+
+    www.sec.gov/files/company_tickers.json        ticker map
+    data.sec.gov/submissions/CIK##########.json   filing history, with ETag / 304
+    www.sec.gov/Archives/edgar/data/...           10-K, 10-Q, 8-K and Form 4 documents
+    www.sec.gov/cgi-bin/browse-edgar              latest-filings Atom feed
+    www.sec.gov/Archives/edgar/daily-index/...    404, like a day with no index
+
+Every accession gets the same document with its accession number injected
+after <body>, so texts (and therefore cache and analysis keys) differ per filing.
+Run standalone to poke at it, or let bench_e2e.py start it:
+
+    python benchmarks/edgar_standin.py --port 8765 --latency 0.05
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from fixtures import COMPANIES, ensure_fixtures, load_submissions
+
+SEC_HOSTS = {"www.sec.gov", "data.sec.gov"}
+
+SUBMISSIONS_RE = re.compile(r"^/submissions/CIK(\d{10})\.json$")
+# /Archives/edgar/data/{cik}/{accession without dashes}/{document}
+ARCHIVE_RE = re.compile(r"^/Archives/edgar/data/(\d+)/(\d{18})/(.+)$")
+# Rendered Form 4s live under an xslF345X## directory, the raw XML next to it
+DOCUMENTS = {"10k.htm": "10k.htm", "10q.htm": "10q.htm", "8k.htm": "8k.htm",
+             "form4.xml": "form4.xml", "xslF345X05/form4.xml": "form4.htm"}
+BODY_MARKER = b"<body>"
+
+
+class Fixtures:
+    """
+    Fixture bodies kept in memory, split around <body> for the accession injection.
+    """
+
+    def __init__(self):
+        self._documents = {}
+        for name, path in ensure_fixtures().items():
+            with open(path, "rb") as f:
+                content = f.read()
+            at = content.find(BODY_MARKER)
+            at = at + len(BODY_MARKER) if at != -1 else 0
+            self._documents[name] = (memoryview(content)[:at], memoryview(content)[at:])
+        self._submissions = {}
+        self._lock = threading.Lock()
+
+    def document(self, name: str, accession: str) -> list:
+        head, tail = self._documents[name]
+        if not name.endswith(".htm"):
+            return [head, tail]
+        return [head, f"<p>{accession}</p>".encode("ascii"), tail]
+
+    def submissions(self, cik: int) -> tuple:
+        with self._lock:
+            if cik not in self._submissions:
+                body = load_submissions(cik)
+                self._submissions[cik] = (body, f'"{hashlib.md5(body).hexdigest()}"')
+            return self._submissions[cik]
+
+
+def atom_feed() -> bytes:
+    entries = []
+    for i, (ticker, cik, title) in enumerate(COMPANIES):
+        accession = f"{cik:010d}-25-{900000 + i:06d}"
+        entries.append(
+            f"<entry><title>4 - {title} ({cik:010d}) (Issuer)</title>"
+            f"<link href=\"https://www.sec.gov/Archives/edgar/data/{cik}/{accession.replace('-', '')}/{accession}-index.htm\"/>"
+            f"<category term=\"4\"/><updated>2025-06-30T16:0{i}:00-04:00</updated>"
+            f"<id>urn:tag:sec.gov,2008:accession-number={accession}</id></entry>"
+        )
+    return ('<?xml version="1.0" encoding="ISO-8859-1" ?><feed xmlns="http://www.w3.org/2005/Atom">'
+            + "".join(entries) + "</feed>").encode("utf-8")
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fixtures = None
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, parts: list = (), content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(sum(len(p) for p in parts)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            for part in parts:
+                self.wfile.write(part)
+        except (BrokenPipeError, ConnectionResetError):
+            # The streaming extractor hangs up once it has enough text
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = urlsplit(self.path).path
+
+        if path == "/files/company_tickers.json":
+            return self._send(200, self.fixtures.document("company_tickers.json", ""))
+
+        match = SUBMISSIONS_RE.match(path)
+        if match:
+            body, etag = self.fixtures.submissions(int(match.group(1)))
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, [body], headers={"ETag": etag})
+
+        match = ARCHIVE_RE.match(path)
+        if match and match.group(3) in DOCUMENTS:
+            name = DOCUMENTS[match.group(3)]
+            content_type = "application/xml" if name.endswith(".xml") else "text/html"
+            return self._send(200, self.fixtures.document(name, match.group(2)), content_type)
+
+        if path == "/cgi-bin/browse-edgar":
+            return self._send(200, [atom_feed()], "application/atom+xml")
+
+        self._send(404, [b"Not Found"], "text/plain")
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections aren't worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(port: int = 0, latency: float = 0.0) -> StandinServer:
+    """
+    Start the stand-in on a background thread. The bound port is server.server_port.
+    """
+    handler = type("Handler", (StandinHandler,), {"fixtures": Fixtures(), "latency": latency})
+    server = StandinServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="edgar-standin", daemon=True).start()
+    return server
+
+
+class StandinAdapter(HTTPAdapter):
+    """
+    Sends requests for SEC hosts to the stand-in instead. Mount it on the
+    EDGAR client's session: `edgar.session.mount("https://", StandinAdapter(url))`.
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url.rstrip("/")
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.netloc in SEC_HOSTS:
+            request.url = self.base_url + parts.path + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+def install(base_url: str, pool_size: int = 16):
+    """
+    Point the process-wide EDGAR client at the stand-in.
+    """
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+    from edgar_client import edgar
+    edgar.session.mount("https://", StandinAdapter(base_url, pool_connections=4, pool_maxsize=pool_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency)
+    print(server.server_port, flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
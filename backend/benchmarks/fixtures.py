@@ -0,0 +1,208 @@
+"""
+Filing fixtures for the benchmarks.
+
+Recorded SEC documents dropped into benchmarks/fixtures/ (e.g. saved with
+`curl -A "<name> <email>" <url>`) are used as-is: 10k.htm, 10q.htm, 8k.htm,
+form4.xml, form4.htm, company_tickers.json and submissions/CIK##########.json.
+Any that are missing are generated deterministically with the same shape:
+an inline-XBRL 10-K/10-Q with a large hidden ix:header, a short 8-K, a Form 4
+(both the raw ownership XML and the rendered HTML), a ticker map, and a
+submissions history per company pointing at those documents.
+"""
+import datetime
+import json
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+WORDS = (
+    "revenue operating income net sales fiscal quarter segment guidance liquidity capital "
+    "expenditures risk factors competition supply chain regulatory litigation customers "
+    "products services margin foreign currency interest rate derivative tax credit facility"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, target_bytes: int):
+    size = 0
+    while size < target_bytes:
+        para = "<p style=\"font-family:Arial;font-size:10pt\">" + " ".join(_sentence(rng) for _ in range(5)) + "</p>\n"
+        size += len(para)
+        yield para
+
+
+def _table(rng: random.Random, rows: int) -> str:
+    cells = "".join(
+        f"<tr><td>{rng.choice(WORDS).title()}</td><td>$</td><td>{rng.randint(100, 99999):,}</td></tr>"
+        for _ in range(rows)
+    )
+    return f"<table>{cells}</table>\n"
+
+
+def periodic_report(form: str, size_mb: float, seed: int = 1) -> bytes:
+    """
+    Inline-XBRL 10-K/10-Q: a hidden ix:header with thousands of facts, a cover page,
+    a table of contents, then the standard Items.
+    """
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    out = ["<html xmlns:ix=\"http://www.xbrl.org/2013/inlineXBRL\"><head><title>", form,
+           "</title><style>p{margin:0}</style></head><body>\n",
+           "<div style=\"display:none\"><ix:header><ix:hidden>"]
+    # Hidden XBRL facts make up a big chunk of real filings
+    for i in range(int(target * 0.25) // 120):
+        out.append(f"<ix:nonNumeric name=\"dei:Fact{i}\" contextRef=\"c-{i % 40}\">{rng.choice(WORDS)}</ix:nonNumeric>")
+    out.append("</ix:hidden></ix:header></div>\n")
+    out.append(f"<p>UNITED STATES SECURITIES AND EXCHANGE COMMISSION</p><p>FORM {form}</p>\n")
+    out.append(_table(rng, 40))  # table of contents
+
+    items = ["Item 1. Business", "Item 1A. Risk Factors", "Item 2. Properties", "Item 3. Legal Proceedings",
+             "Item 7. Management's Discussion and Analysis of Financial Condition and Results of Operations",
+             "Item 7A. Quantitative and Qualitative Disclosures About Market Risk",
+             "Item 8. Financial Statements and Supplementary Data"]
+    if form == "10-Q":
+        items = ["Item 1. Financial Statements",
+                 "Item 2. Management's Discussion and Analysis of Financial Condition and Results of Operations",
+                 "Item 3. Quantitative and Qualitative Disclosures About Market Risk",
+                 "Item 4. Controls and Procedures", "Item 1A. Risk Factors"]
+    body_budget = (target - sum(len(p) for p in out)) // len(items)
+    for item in items:
+        out.append(f"<p style=\"font-weight:bold\">{item}</p>\n")
+        out.extend(_paragraphs(rng, int(body_budget * 0.8)))
+        out.append(_table(rng, max(1, int(body_budget * 0.2) // 80)))
+    out.append("</body></html>\n")
+    return "".join(out).encode("utf-8")
+
+
+def current_report(seed: int = 2) -> bytes:
+    rng = random.Random(seed)
+    paras = "".join(_paragraphs(rng, 20 * 1024))
+    return (
+        "<html><body><p>FORM 8-K</p><p>CURRENT REPORT</p>"
+        "<p>Item 5.02 Departure of Directors or Certain Officers</p>" + paras +
+        "<p>Item 9.01 Financial Statements and Exhibits</p></body></html>"
+    ).encode("utf-8")
+
+
+def form4_xml(seed: int = 3, transactions: int = 4) -> bytes:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(transactions):
+        code = rng.choice(["S", "P", "F", "M"])
+        rows.append(f"""
+    <nonDerivativeTransaction>
+        <securityTitle><value>Common Stock</value></securityTitle>
+        <transactionDate><value>2025-02-0{i + 1}</value></transactionDate>
+        <transactionCoding><transactionFormType>4</transactionFormType><transactionCode>{code}</transactionCode>
+            <equitySwapInvolved>0</equitySwapInvolved>{'<footnoteId id="F1"/>' if code == "S" else ''}</transactionCoding>
+        <transactionAmounts>
+            <transactionShares><value>{rng.randint(100, 50000)}</value></transactionShares>
+            <transactionPricePerShare><value>{rng.uniform(50, 300):.2f}</value></transactionPricePerShare>
+            <transactionAcquiredDisposedCode><value>{'A' if code in 'PM' else 'D'}</value></transactionAcquiredDisposedCode>
+        </transactionAmounts>
+        <postTransactionAmounts><sharesOwnedFollowingTransaction><value>{rng.randint(10000, 900000)}</value></sharesOwnedFollowingTransaction></postTransactionAmounts>
+        <ownershipNature><directOrIndirectOwnership><value>D</value></directOrIndirectOwnership></ownershipNature>
+    </nonDerivativeTransaction>""")
+    return f"""<?xml version="1.0"?>
+<ownershipDocument>
+    <schemaVersion>X0508</schemaVersion>
+    <documentType>4</documentType>
+    <periodOfReport>2025-02-01</periodOfReport>
+    <issuer><issuerCik>0000320193</issuerCik><issuerName>Apple Inc.</issuerName><issuerTradingSymbol>AAPL</issuerTradingSymbol></issuer>
+    <reportingOwner>
+        <reportingOwnerId><rptOwnerCik>0001214156</rptOwnerCik><rptOwnerName>COOK TIMOTHY D</rptOwnerName></reportingOwnerId>
+        <reportingOwnerRelationship><isDirector>1</isDirector><isOfficer>1</isOfficer><officerTitle>Chief Executive Officer</officerTitle><isTenPercentOwner>0</isTenPercentOwner></reportingOwnerRelationship>
+    </reportingOwner>
+    <nonDerivativeTable>{''.join(rows)}
+    </nonDerivativeTable>
+    <footnotes><footnote id="F1">Sale effected pursuant to a Rule 10b5-1 trading plan adopted on August 1, 2024.</footnote></footnotes>
+</ownershipDocument>
+""".encode("utf-8")
+
+
+def form4_html(seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    return (
+        "<html><body><table><tr><td>FORM 4</td><td>STATEMENT OF CHANGES IN BENEFICIAL OWNERSHIP</td></tr></table>"
+        "<table><tr><td>COOK TIMOTHY D</td><td>Apple Inc. [ AAPL ]</td></tr></table>" + _table(rng, 30) +
+        "<p>(1) Sale effected pursuant to a Rule 10b5-1 trading plan.</p></body></html>"
+    ).encode("utf-8")
+
+
+# Real tickers first so hand-run lookups work, then filler so the map has SEC's size
+COMPANIES = [("AAPL", 320193, "Apple Inc."), ("MSFT", 789019, "MICROSOFT CORP"),
+             ("NVDA", 1045810, "NVIDIA CORP"), ("AMZN", 1018724, "AMAZON COM INC"),
+             ("TSLA", 1318605, "Tesla, Inc.")]
+
+
+def company_tickers(count: int = 10000, seed: int = 5) -> bytes:
+    rng = random.Random(seed)
+    entries = list(COMPANIES)
+    while len(entries) < count:
+        ticker = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 5)))
+        entries.append((ticker, 2000000 + len(entries), f"{ticker.title()} Holdings"))
+    data = {str(i): {"cik_str": cik, "ticker": ticker, "title": title} for i, (ticker, cik, title) in enumerate(entries)}
+    return json.dumps(data).encode("utf-8")
+
+
+# Primary document per form, served by the stand-in server from the fixtures above
+PRIMARY_DOCUMENTS = {"10-K": "10k.htm", "10-Q": "10q.htm", "8-K": "8k.htm", "4": "xslF345X05/form4.xml"}
+
+
+def submissions(cik: int, filings: int = 60, seed: int = 6) -> bytes:
+    """
+    data.sec.gov submissions JSON: newest first, a 10-K a year, 10-Qs each quarter,
+    8-Ks and Form 4s in between.
+    """
+    rng = random.Random(seed + cik)
+    day = datetime.date(2025, 6, 30)
+    recent = {"accessionNumber": [], "form": [], "filingDate": [], "reportDate": [], "primaryDocument": []}
+    for i in range(filings):
+        day -= datetime.timedelta(days=rng.randint(1, 6))
+        form = "10-K" if i % 24 == 23 else "10-Q" if i % 8 == 7 else rng.choice(["8-K", "4", "4", "4"])
+        recent["accessionNumber"].append(f"{cik:010d}-25-{filings - i:06d}")
+        recent["form"].append(form)
+        recent["filingDate"].append(day.isoformat())
+        recent["reportDate"].append(day.isoformat() if form != "4" else "")
+        recent["primaryDocument"].append(PRIMARY_DOCUMENTS[form])
+    return json.dumps({"cik": str(cik), "filings": {"recent": recent}}).encode("utf-8")
+
+
+def load_submissions(cik: int) -> bytes:
+    """
+    Recorded submissions for a CIK if there are any, generated ones otherwise.
+    """
+    path = os.path.join(FIXTURES_DIR, "submissions", f"CIK{cik:010d}.json")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return submissions(cik)
+
+
+GENERATORS = {
+    "10k.htm": lambda: periodic_report("10-K", 50),
+    "10q.htm": lambda: periodic_report("10-Q", 8, seed=4),
+    "8k.htm": current_report,
+    "form4.xml": form4_xml,
+    "form4.htm": form4_html,
+    "company_tickers.json": company_tickers,
+}
+
+
+def ensure_fixtures() -> dict:
+    """
+    Return { name: path } for every fixture, generating the missing ones.
+    """
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    paths = {}
+    for name, generate in GENERATORS.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(generate())
+        paths[name] = path
+    return paths
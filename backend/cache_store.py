@@ -0,0 +1,281 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:  # optional, falls back to zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(CACHE_DIR, "cache.db"))
+# Total compressed bytes kept before least-recently-used entries are evicted
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Budget for the in-process tier in front of SQLite (0 disables it)
+CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+# Memory hits are recorded for the disk LRU in batches of this size
+TOUCH_BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+"""
+
+
+def make_key(*parts) -> str:
+    """
+    Content-addressed key: sha256 over all the parts that determine the value
+    (e.g. model name, generation settings and the full prompt).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _compress(text: str):
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def _decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    return bytes(data).decode("utf-8")
+
+
+class MemoryLRU:
+    """
+    Thread-safe, byte-budgeted LRU of decoded strings.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value: str):
+        size = sys.getsizeof(value)
+        # Don't let one huge value flush everything else out
+        if size > self.max_bytes // 4:
+            self.delete(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+
+class CacheStore:
+    """
+    Shared cache for fetched filing text and LLM results, in one SQLite file.
+    Values are compressed, writes are transactional (a reader never sees a
+    partial value), entries are grouped by namespace, and the total size is
+    kept under a byte budget by evicting least-recently-used entries.
+    """
+
+    def __init__(self, path: str = CACHE_DB_PATH, max_bytes: int = CACHE_MAX_BYTES,
+                 memory_bytes: int = CACHE_MEMORY_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Read-through / write-through memory tier; hot entries never touch SQLite
+        self.memory = MemoryLRU(memory_bytes) if memory_bytes > 0 else None
+        self._touched = {}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._stats = {"hits": 0, "memory_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+        self._namespace_stats = {}
+
+    def _count(self, namespace: str, key: str):
+        self._stats[key] += 1
+        ns = self._namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0})
+        if key in ns:
+            ns[key] += 1
+
+    def get(self, namespace: str, key: str):
+        """
+        Return the cached string, or None on a miss.
+        """
+        if self.memory is not None:
+            value = self.memory.get((namespace, key))
+            if value is not None:
+                with self._lock:
+                    self._count(namespace, "hits")
+                    self._stats["memory_hits"] += 1
+                    # Remember the access so the disk LRU doesn't evict hot entries
+                    self._touched[(namespace, key)] = time.time()
+                    if len(self._touched) >= TOUCH_BATCH:
+                        self._flush_touches()
+                return value
+
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT codec, data FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                if row is None:
+                    self._count(namespace, "misses")
+                    return None
+                value = _decompress(row[0], row[1])
+                self._conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (time.time(), namespace, key),
+                )
+                self._conn.commit()
+                self._count(namespace, "hits")
+            except Exception as e:
+                logger.error(f"Cache read failed for {namespace}/{key}: {e}")
+                self._count(namespace, "errors")
+                self._count(namespace, "misses")
+                return None
+
+        if self.memory is not None:
+            self.memory.set((namespace, key), value)
+        return value
+
+    def _flush_touches(self):
+        # Caller holds the lock
+        touched = [(accessed_at, ns, key) for (ns, key), accessed_at in self._touched.items()]
+        self._touched.clear()
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?", touched
+                )
+        except Exception as e:
+            logger.error(f"Cache access-time update failed: {e}")
+
+    def set(self, namespace: str, key: str, value: str):
+        if self.memory is not None:
+            self.memory.set((namespace, key), value)
+        with self._lock:
+            try:
+                codec, data = _compress(value)
+                now = time.time()
+                with self._conn:
+                    old = self._conn.execute(
+                        "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                    ).fetchone()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO entries (namespace, key, codec, size, data, created_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (namespace, key, codec, len(data), data, now, now),
+                    )
+                self._total_bytes += len(data) - (old[0] if old else 0)
+                self._count(namespace, "writes")
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+            except Exception as e:
+                logger.error(f"Cache write failed for {namespace}/{key}: {e}")
+                self._count(namespace, "errors")
+
+    def delete(self, namespace: str, key: str):
+        if self.memory is not None:
+            self.memory.delete((namespace, key))
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                    self._total_bytes -= row[0]
+
+    def _evict(self):
+        # Caller holds the lock. Drop LRU entries until we're 10% under budget.
+        target = self.max_bytes * 0.9
+        self._flush_touches()
+        with self._conn:
+            while self._total_bytes > target:
+                victims = self._conn.execute(
+                    "SELECT namespace, key, size FROM entries ORDER BY accessed_at LIMIT 64"
+                ).fetchall()
+                if not victims:
+                    self._total_bytes = 0
+                    break
+                for namespace, key, size in victims:
+                    self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                    self._total_bytes -= size
+                    self._stats["evictions"] += 1
+                    if self._total_bytes <= target:
+                        break
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes"] = self._total_bytes
+            stats["max_bytes"] = self.max_bytes
+            stats["namespaces"] = {ns: dict(v) for ns, v in self._namespace_stats.items()}
+            if self.memory is not None:
+                stats["memory_entries"] = len(self.memory)
+                stats["memory_bytes"] = self.memory.bytes
+                stats["memory_evictions"] = self.memory.evictions
+            return stats
+
+
+# Process-wide cache shared by scraper and analyzer
+cache = CacheStore()
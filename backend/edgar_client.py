@@ -0,0 +1,158 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# SEC EDGAR requires a User-Agent in the format: "Sample Company Name AdminContact@<sample company domain>.com"
+# or "Individual Name AdminContact@<email>.com"
+HEADERS = {
+    "User-Agent": "Individual Investor gemini_hackathon@example.com",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# SEC fair-access policy caps clients at 10 requests/second. Stay a bit under it.
+MAX_REQUESTS_PER_SECOND = float(os.getenv("EDGAR_MAX_RPS", 8))
+POOL_SIZE = int(os.getenv("EDGAR_POOL_SIZE", 16))
+MAX_RETRIES = int(os.getenv("EDGAR_MAX_RETRIES", 4))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+TIMEOUT = (10, 60)  # (connect, read)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until enough tokens are available
+    and returns how long it waited.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1) -> float:
+        with self._lock:
+            self._refill()
+            # Reserve the tokens now (possibly going negative) so waiters queue up fairly
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def set_rate(self, rate: float):
+        """
+        Change the refill rate (e.g. backing off after the upstream throttles us).
+        """
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+class EdgarClient:
+    """
+    Shared HTTP client for SEC endpoints: pooled keep-alive connections,
+    gzip, a global rate limit and jittered retries on 429/5xx.
+    """
+
+    def __init__(self, max_rps: float = MAX_REQUESTS_PER_SECOND, pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES, timeout=TIMEOUT):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiter = TokenBucket(max_rps)
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "bytes": 0,
+            "retries": 0,
+            "errors": 0,
+            "throttle_waits": 0,
+            "throttle_wait_seconds": 0.0,
+        }
+
+    def _count(self, key: str, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        # Honour Retry-After if SEC sends one, otherwise exponential backoff with full jitter
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def get(self, url: str, headers: dict = None, stream: bool = False) -> requests.Response:
+        """
+        Rate-limited GET with retries. Raises requests.HTTPError for non-retryable
+        error statuses (or when retries run out), like response.raise_for_status().
+        """
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire()
+            if waited > 0:
+                self._count("throttle_waits")
+                self._count("throttle_wait_seconds", waited)
+
+            self._count("requests")
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    self._count("errors")
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"EDGAR request failed ({e}), retrying in {delay:.1f}s: {url}")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if not stream:
+                        self._count("bytes", len(response.content))
+                    if response.status_code >= 400:
+                        self._count("errors")
+                        # Nobody reads an error body; give a streamed connection back to the pool
+                        response.close()
+                    response.raise_for_status()
+                    return response
+                delay = self._backoff(attempt, response)
+                logger.warning(f"EDGAR returned {response.status_code}, retrying in {delay:.1f}s: {url}")
+                response.close()
+
+            self._count("retries")
+            attempt += 1
+            time.sleep(delay)
+
+    def record_bytes(self, amount: int):
+        """
+        For streamed responses, callers report how much of the body they consumed.
+        """
+        self._count("bytes", amount)
+
+
+# Process-wide client shared by scraper and monitor
+edgar = EdgarClient()
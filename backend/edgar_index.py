@@ -0,0 +1,33 @@
+# EDGAR index parsing, free of import side effects: backfill's worker processes import it
+
+
+def parse_master_index(text: str, ciks=None) -> list:
+    """
+    Parse an EDGAR master index (daily-index or quarterly full-index).
+    Returns a list of dicts { 'cik', 'company', 'form', 'filingDate', 'accessionNumber' },
+    optionally only for a set of 10-digit CIKs.
+    """
+    entries = []
+    in_body = False
+    # Header text, then "CIK|Company Name|Form Type|Date Filed|Filename", a dashed line, then rows
+    for line in text.splitlines():
+        if not in_body:
+            in_body = line.startswith("-----")
+            continue
+        parts = line.split("|")
+        if len(parts) != 5:
+            continue
+        cik, company, form, date_filed, filename = parts
+        cik = cik.zfill(10)
+        if ciks is not None and cik not in ciks:
+            continue
+        entries.append({
+            "cik": cik,
+            "company": company,
+            "form": form,
+            # Daily indexes use YYYYMMDD, quarterly ones YYYY-MM-DD
+            "filingDate": date_filed if "-" in date_filed else f"{date_filed[:4]}-{date_filed[4:6]}-{date_filed[6:8]}",
+            # edgar/data/320193/0000320193-25-000008.txt
+            "accessionNumber": filename.rsplit("/", 1)[-1].replace(".txt", ""),
+        })
+    return entries
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# How many past events a reconnecting client can resume from
+BUFFER_SIZE = 1000
+# Per-subscriber backlog before a slow client is dropped (it can resume via Last-Event-ID)
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+class Subscription:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def _deliver(self, event):
+        # Runs on the subscriber's event loop
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Feed subscriber fell behind, disconnecting it")
+            self.closed = True
+            # Wake the reader up so it notices
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class FeedBus:
+    """
+    In-process pub/sub for new filings. publish() may be called from any
+    thread (the monitor tick runs in a worker thread); subscribers are
+    asyncio queues on the server's event loop. A bounded ring buffer of
+    past events lets clients resume with Last-Event-ID.
+    """
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        # Seed ids with the clock so they keep increasing across restarts
+        self._next_id = int(time.time() * 1000)
+
+    def publish(self, event_type: str, data: dict) -> int:
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            event = {"id": event_id, "event": event_type, "data": data}
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:
+                # Loop already closed
+                self.unsubscribe(sub)
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a subscriber on the running event loop.
+        Returns (subscription, backlog) where backlog holds buffered events after last_event_id.
+        """
+        sub = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            backlog = []
+            if last_event_id is not None:
+                backlog = [e for e in self._buffer if e["id"] > last_event_id]
+            self._subscribers.add(sub)
+        return sub, backlog
+
+    def unsubscribe(self, sub: Subscription):
+        sub.closed = True
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Process-wide bus the monitor publishes new filings to
+bus = FeedBus()
@@ -0,0 +1,89 @@
+import bisect
+import threading
+
+# Enough for ~10 recent filings across a few hundred tickers
+MAX_ITEMS = 5000
+
+
+class FeedIndex:
+    """
+    Bounded, date-ordered index of recent filings across all tracked tickers.
+    Kept up to date incrementally by the monitor; reads never touch the network.
+
+    Items are ordered by (filingDate, accessionNumber), which is also the
+    pagination cursor, so a page is a bisect plus a walk of k items.
+    """
+
+    def __init__(self, max_items: int = MAX_ITEMS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._keys = []   # ascending (filingDate, accessionNumber)
+        self._items = {}  # key -> filing dict
+        self._accessions = {}  # accessionNumber -> key
+
+    @staticmethod
+    def _key(filing: dict):
+        return (filing['filingDate'], filing['accessionNumber'])
+
+    def add(self, filing: dict) -> bool:
+        """
+        Insert a filing (dict as returned by scraper.get_recent_filings).
+        Returns False if it was already present.
+        """
+        key = self._key(filing)
+        with self._lock:
+            if filing['accessionNumber'] in self._accessions:
+                return False
+            bisect.insort(self._keys, key)
+            self._items[key] = filing
+            self._accessions[filing['accessionNumber']] = key
+            # Evict the oldest entries once over budget
+            while len(self._keys) > self.max_items:
+                evicted = self._keys.pop(0)
+                self._accessions.pop(self._items.pop(evicted)['accessionNumber'], None)
+        return True
+
+    def add_many(self, filings: list) -> int:
+        return sum(1 for f in filings if self.add(f))
+
+    def query(self, limit: int = 20, since: str = None, forms=None, cursor: str = None):
+        """
+        Newest-first page of filings.
+        since: only filings on/after this YYYY-MM-DD date
+        forms: optional collection of form types to include
+        cursor: next_cursor from a previous page
+        Returns (items, next_cursor); next_cursor is None on the last page.
+        """
+        forms = set(forms) if forms else None
+        with self._lock:
+            if cursor:
+                filing_date, _, accession = cursor.partition("|")
+                end = bisect.bisect_left(self._keys, (filing_date, accession))
+            else:
+                end = len(self._keys)
+
+            items = []
+            i = end - 1
+            while i >= 0 and len(items) < limit:
+                key = self._keys[i]
+                if since and key[0] < since:
+                    break
+                filing = self._items[key]
+                if forms is None or filing['form'] in forms:
+                    items.append(filing)
+                i -= 1
+
+            more = i >= 0 and not (since and self._keys[i][0] < since)
+
+        next_cursor = None
+        if more and items:
+            last = items[-1]
+            next_cursor = f"{last['filingDate']}|{last['accessionNumber']}"
+        return items, next_cursor
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# Process-wide materialized feed, fed by the monitor and /api/track
+feed_index = FeedIndex()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import re
+
+from cache_store import cache
+
+# Bump when the splitting or selection rules change (it's part of the analysis cache keys)
+SECTIONS_VERSION = "items-v1"
+SECTIONS_NAMESPACE = "filing_sections"
+
+# Text extracted from filings has one text node per line, so headings start a line.
+# "Item 1A. Risk Factors", "ITEM 7 - MANAGEMENT'S DISCUSSION", "Item 2.02 Results of Operations"
+ITEM_RE = re.compile(r"^[ \t]*item[ \t\xa0]*(\d{1,2}(?:\.\d{2}|[a-c])?)\b[ \t\xa0]*[\.:\-–—]?[ \t\xa0]*(.*)$",
+                     re.IGNORECASE | re.MULTILINE)
+PART_RE = re.compile(r"^[ \t]*part[ \t\xa0]+(iv|iii|ii|i)\b", re.IGNORECASE | re.MULTILINE)
+
+# Sections worth sending to the LLM, most important first.
+# 10-Q item numbers repeat across Part I and Part II, so those keys carry the part.
+SECTION_PRIORITIES = {
+    "10-K": ["7", "1A", "1", "3", "7A", "9A"],
+    "10-Q": ["I.2", "II.1A", "II.1", "I.1", "I.3"],
+}
+
+
+def build_section_index(text: str) -> list:
+    """
+    Split filing text into its standard Items.
+    Returns [{ 'key', 'part', 'item', 'title', 'start', 'end' }] sorted by offset.
+
+    Each item heading appears in the table of contents and again in the body;
+    the body occurrence is the one followed by the most text before the next heading.
+    """
+    parts = [(m.start(), m.group(1).upper()) for m in PART_RE.finditer(text)]
+    headings = []
+    part_idx = -1
+    for m in ITEM_RE.finditer(text):
+        while part_idx + 1 < len(parts) and parts[part_idx + 1][0] <= m.start():
+            part_idx += 1
+        part = parts[part_idx][1] if part_idx >= 0 else ""
+        item = m.group(1).upper()
+        headings.append({"part": part, "item": item, "title": m.group(2).strip()[:120], "start": m.start()})
+
+    best = {}
+    for i, h in enumerate(headings):
+        end = headings[i + 1]["start"] if i + 1 < len(headings) else len(text)
+        key = f"{h['part']}.{h['item']}" if h['part'] else h['item']
+        if key not in best or end - h["start"] > best[key]["end"] - best[key]["start"]:
+            best[key] = dict(h, key=key, end=end)
+
+    return sorted(best.values(), key=lambda s: s["start"])
+
+
+def get_section_index(text: str, text_hash: str = None) -> list:
+    """
+    Section index for a filing's text, stored in the cache store next to the text.
+    """
+    text_hash = text_hash or hashlib.md5(text.encode('utf-8')).hexdigest()
+    cache_key = f"{SECTIONS_VERSION}:{text_hash}"
+    cached = cache.get(SECTIONS_NAMESPACE, cache_key)
+    if cached is not None:
+        return json.loads(cached)
+    index = build_section_index(text)
+    cache.set(SECTIONS_NAMESPACE, cache_key, json.dumps(index))
+    return index
+
+
+def _lookup(index: list, form: str, key: str):
+    base_form = form.split("/")[0]
+    if base_form == "10-K":
+        # Item numbers are unique across 10-K parts
+        matches = [s for s in index if s["item"] == key]
+    else:
+        matches = [s for s in index if s["key"] == key or (s["part"] == "" and s["item"] == key.split(".")[-1])]
+    # If the same item was indexed under more than one part, the longest is the real one
+    return max(matches, key=lambda s: s["end"] - s["start"], default=None)
+
+
+def _allocate(lengths: list, budget: int) -> list:
+    """
+    Split a character budget across sections: short sections are packed whole
+    and what they don't use is shared among the longer ones.
+    """
+    shares = [0] * len(lengths)
+    remaining = budget
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for n, i in enumerate(order):
+        fair = remaining // (len(order) - n)
+        shares[i] = min(lengths[i], fair)
+        remaining -= shares[i]
+    return shares
+
+
+def select_sections(text: str, form: str, max_chars: int, text_hash: str = None) -> str:
+    """
+    Text to put in an LLM prompt for this filing: the sections that matter for the
+    form type (e.g. Risk Factors and MD&A for a 10-K) instead of the cover page and
+    table of contents. Falls back to the first max_chars when no Items are found.
+    """
+    priorities = SECTION_PRIORITIES.get(form.split("/")[0])
+    if not priorities or len(text) <= max_chars:
+        return text[:max_chars]
+
+    index = get_section_index(text, text_hash)
+    sections = [s for s in (_lookup(index, form, key) for key in priorities) if s]
+    if not sections:
+        return text[:max_chars]
+
+    headers = [f"[{'Part ' + s['part'] + ', ' if s['part'] else ''}Item {s['item']}. {s['title']}]\n" for s in sections]
+    budget = max_chars - sum(len(h) + 2 for h in headers)
+    shares = _allocate([s["end"] - s["start"] for s in sections], budget)
+    return "\n\n".join(
+        header + text[s["start"]:s["start"] + share] for header, s, share in zip(headers, sections, shares)
+    )
@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import threading
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("FILING_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "filings.db"))
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    accession TEXT PRIMARY KEY,
+    cik TEXT NOT NULL,
+    form TEXT NOT NULL,
+    filing_date TEXT NOT NULL,
+    report_date TEXT,
+    primary_document TEXT
+);
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    unit TEXT PRIMARY KEY,
+    filings INTEGER NOT NULL,
+    done_at REAL NOT NULL
+);
+-- Per company, per form and across everything, each ending in the (filing_date, accession)
+-- pagination key: "latest 10-K for X", "8-Ks since D" and "Form 4s on day D" are range scans
+CREATE INDEX IF NOT EXISTS filings_cik_form_date ON filings (cik, form, filing_date, accession);
+CREATE INDEX IF NOT EXISTS filings_cik_date ON filings (cik, filing_date, accession);
+CREATE INDEX IF NOT EXISTS filings_form_date ON filings (form, filing_date, accession);
+CREATE INDEX IF NOT EXISTS filings_date ON filings (filing_date, accession);
+"""
+
+COLUMNS = "cik, form, accession, filing_date, report_date, primary_document"
+KEYS = ("cik", "form", "accessionNumber", "filingDate", "reportDate", "primaryDocument")
+
+# Rows from a master index have no report date or primary document; don't let
+# them blank out what the submissions JSON already told us
+UPSERT = """
+INSERT INTO filings (accession, cik, form, filing_date, report_date, primary_document)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (accession) DO UPDATE SET
+    form = excluded.form,
+    filing_date = excluded.filing_date,
+    report_date = COALESCE(excluded.report_date, filings.report_date),
+    primary_document = COALESCE(excluded.primary_document, filings.primary_document)
+"""
+
+
+def filing_row(cik: str, accession: str, form: str, filing_date: str, report_date: str = None,
+               primary_document: str = None) -> tuple:
+    """
+    A filings row; empty strings (as in submissions JSON) are stored as NULL.
+    """
+    return (accession, cik, form, filing_date, report_date or None, primary_document or None)
+
+
+def _where(ciks=None, forms=None, since: str = None, until: str = None, before: tuple = None):
+    clauses, params = [], []
+    for column, values in (("cik", ciks), ("form", forms)):
+        if values is not None:
+            values = list(values)
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            params += values
+    if since:
+        clauses.append("filing_date >= ?")
+        params.append(since)
+    if until:
+        clauses.append("filing_date <= ?")
+        params.append(until)
+    if before:
+        clauses.append("(filing_date, accession) < (?, ?)")
+        params += before
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def parse_cursor(cursor: str) -> tuple:
+    """
+    (filing_date, accession) from a next_cursor. Raises ValueError if malformed.
+    """
+    filing_date, sep, accession = cursor.partition("|")
+    if not sep or not DATE_RE.match(filing_date) or not accession:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return filing_date, accession
+
+
+class FilingStore:
+    """
+    Filing metadata (one row per accession) in SQLite (WAL mode). Filled by
+    the bulk backfill and kept current by the scraper (every submissions
+    download) and the monitor (daily indexes). Each backfill unit is written
+    in the same transaction as its checkpoint, so an interrupted run resumes
+    without double work.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def upsert(self, rows: list, checkpoints: list = ()):
+        """
+        Write filing_row() tuples, and mark backfill units done: checkpoints is
+        [(unit, filings)]. All in one transaction.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO backfill_checkpoints (unit, filings, done_at) VALUES (?, ?, ?)",
+                [(unit, filings, now) for unit, filings in checkpoints],
+            )
+
+    def completed_units(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT unit FROM backfill_checkpoints")}
+
+    def clear_checkpoints(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM backfill_checkpoints")
+
+    def filings(self, ciks=None, forms=None, since: str = None, until: str = None, before: tuple = None,
+                limit: int = None) -> list:
+        """
+        Stored filings, newest first, as dicts { 'cik', 'form', 'accessionNumber',
+        'filingDate', 'reportDate', 'primaryDocument' }. since/until are inclusive
+        YYYY-MM-DD bounds; before is a (filing_date, accession) key to continue after.
+        """
+        where, params = _where(ciks, forms, since, until, before)
+        sql = f"SELECT {COLUMNS} FROM filings {where} ORDER BY filing_date DESC, accession DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(KEYS, row)) for row in rows]
+
+    def query(self, ciks=None, forms=None, since: str = None, until: str = None, limit: int = 20,
+              cursor: str = None):
+        """
+        One page of filings(), newest first, with keyset pagination.
+        cursor: next_cursor from a previous page
+        Returns (items, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        before = parse_cursor(cursor) if cursor else None
+        # One extra row tells whether there is another page
+        items = self.filings(ciks, forms, since, until, before, limit + 1)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = f"{last['filingDate']}|{last['accessionNumber']}"
+        return items, next_cursor
+
+    def latest(self, cik: str, form: str):
+        """
+        The most recent filing of a form by a company, or None.
+        """
+        items = self.filings(ciks=[cik], forms=[form], limit=1)
+        return items[0] if items else None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM filings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide store behind /api/filings, kept current by the scraper and monitor
+filing_store = FilingStore()
@@ -0,0 +1,196 @@
+import re
+import xml.etree.ElementTree as ET
+
+# Bump when parsing or the table sent to the LLM changes (it's part of the batch cache key)
+FORM4_VERSION = "form4-v1"
+
+# Transaction codes, see the Form 4 General Instructions
+CODE_NAMES = {
+    "P": "Open market purchase",
+    "S": "Open market sale",
+    "A": "Grant/award",
+    "D": "Disposition to issuer",
+    "F": "Tax withholding",
+    "M": "Option exercise",
+    "X": "Option exercise",
+    "C": "Conversion",
+    "G": "Gift",
+    "J": "Other",
+}
+# Activity that says nothing about insider conviction on its own
+ROUTINE_CODES = {"F", "M", "X"}
+
+PLAN_RE = re.compile(r"10b5-?1", re.IGNORECASE)
+
+
+def ownership_xml_url(url: str) -> str:
+    """
+    Submissions list Form 4s by their rendered page (.../xslF345X05/form4.xml);
+    the raw ownership XML is the same file without the stylesheet directory.
+    """
+    return re.sub(r"/xslF345X\d+/", "/", url)
+
+
+def _text(node, path: str, default: str = "") -> str:
+    if node is None:
+        return default
+    found = node.find(path)
+    if found is None or found.text is None:
+        return default
+    return found.text.strip()
+
+
+def _flag(node, path: str) -> bool:
+    return _text(node, path).lower() in ("1", "true")
+
+
+def _number(node, path: str):
+    value = _text(node, path)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_ownership_xml(content: bytes) -> dict:
+    """
+    Parse a Form 3/4/5 ownership XML document into plain records:
+    { 'issuer': {...}, 'owners': [...], 'transactions': [...], 'planned_10b5_1': bool }
+    Each transaction: { 'insider', 'role', 'is_director', 'is_officer', 'is_ten_percent_owner',
+    'date', 'security', 'derivative', 'code', 'acquired', 'shares', 'price', 'value',
+    'shares_after', 'direct', 'is_10b5_1' }
+    Raises ValueError on malformed XML.
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid ownership XML: {e}")
+
+    footnotes = {fn.get("id"): (fn.text or "").strip() for fn in root.iter("footnote")}
+    # Checkbox added in 2023: the whole report is covered by a 10b5-1 plan
+    planned_doc = _flag(root, "aff10b5One")
+
+    issuer = {
+        "cik": _text(root, "issuer/issuerCik").zfill(10),
+        "name": _text(root, "issuer/issuerName"),
+        "ticker": _text(root, "issuer/issuerTradingSymbol").upper(),
+    }
+
+    owners = []
+    for owner in root.findall("reportingOwner"):
+        rel = owner.find("reportingOwnerRelationship")
+        roles = []
+        if _flag(rel, "isDirector"):
+            roles.append("Director")
+        if _flag(rel, "isOfficer"):
+            roles.append(_text(rel, "officerTitle") or "Officer")
+        if _flag(rel, "isTenPercentOwner"):
+            roles.append("10% Owner")
+        if _flag(rel, "isOther"):
+            roles.append(_text(rel, "otherText") or "Other")
+        owners.append({
+            "name": _text(owner, "reportingOwnerId/rptOwnerName"),
+            "cik": _text(owner, "reportingOwnerId/rptOwnerCik").zfill(10),
+            "role": ", ".join(roles),
+            "is_director": _flag(rel, "isDirector"),
+            "is_officer": _flag(rel, "isOfficer"),
+            "is_ten_percent_owner": _flag(rel, "isTenPercentOwner"),
+        })
+
+    insider = "; ".join(o["name"] for o in owners)
+    role = "; ".join(o["role"] for o in owners if o["role"])
+
+    transactions = []
+    for table, derivative in (("nonDerivativeTable/nonDerivativeTransaction", False),
+                              ("derivativeTable/derivativeTransaction", True)):
+        for tx in root.findall(table):
+            shares = _number(tx, "transactionAmounts/transactionShares/value")
+            price = _number(tx, "transactionAmounts/transactionPricePerShare/value")
+            notes = [footnotes.get(ref.get("id"), "") for ref in tx.iter("footnoteId")]
+            transactions.append({
+                "insider": insider,
+                "role": role,
+                "is_director": any(o["is_director"] for o in owners),
+                "is_officer": any(o["is_officer"] for o in owners),
+                "is_ten_percent_owner": any(o["is_ten_percent_owner"] for o in owners),
+                "date": _text(tx, "transactionDate/value"),
+                "security": _text(tx, "securityTitle/value"),
+                "derivative": derivative,
+                "code": _text(tx, "transactionCoding/transactionCode"),
+                "acquired": _text(tx, "transactionAmounts/transactionAcquiredDisposedCode/value") == "A",
+                "shares": shares or 0.0,
+                "price": price,
+                "value": round((shares or 0.0) * (price or 0.0), 2),
+                "shares_after": _number(tx, "postTransactionAmounts/sharesOwnedFollowingTransaction/value"),
+                "direct": _text(tx, "ownershipNature/directOrIndirectOwnership/value") != "I",
+                "is_10b5_1": planned_doc or any(PLAN_RE.search(n) for n in notes),
+            })
+
+    return {"issuer": issuer, "owners": owners, "transactions": transactions, "planned_10b5_1": planned_doc}
+
+
+def insider_metrics(transactions: list) -> dict:
+    """
+    Deterministic insider-activity signals for a batch of parsed transactions.
+    Only open-market trades (P/S) count towards dollar flows.
+    """
+    buys = [t for t in transactions if t["code"] == "P"]
+    sells = [t for t in transactions if t["code"] == "S"]
+    buy_value = sum(t["value"] for t in buys)
+    sell_value = sum(t["value"] for t in sells)
+    unplanned_buys = [t for t in buys if not t["is_10b5_1"]]
+    unplanned_sells = [t for t in sells if not t["is_10b5_1"]]
+    buyers = {t["insider"] for t in unplanned_buys}
+
+    return {
+        "transactions": len(transactions),
+        "open_market_buys": len(buys),
+        "open_market_sells": len(sells),
+        "buy_value": round(buy_value, 2),
+        "sell_value": round(sell_value, 2),
+        "net_dollar": round(buy_value - sell_value, 2),
+        "unplanned_buy_value": round(sum(t["value"] for t in unplanned_buys), 2),
+        "unplanned_sell_value": round(sum(t["value"] for t in unplanned_sells), 2),
+        "planned_sell_value": round(sum(t["value"] for t in sells if t["is_10b5_1"]), 2),
+        "distinct_unplanned_buyers": len(buyers),
+        # Several insiders buying on their own initiative in the same batch
+        "cluster_buy": len(buyers) >= 2,
+        "ten_percent_owner_buy_value": round(sum(t["value"] for t in buys if t["is_ten_percent_owner"]), 2),
+        "ten_percent_owner_sell_value": round(sum(t["value"] for t in sells if t["is_ten_percent_owner"]), 2),
+        "routine_only": bool(transactions) and all(t["code"] in ROUTINE_CODES for t in transactions),
+    }
+
+
+def format_transaction_table(transactions: list) -> str:
+    """
+    Compact pipe-separated table for the LLM prompt (a few dozen tokens per trade).
+    """
+    lines = ["date | insider | role | code | A/D | shares | price | value | 10b5-1 | owned after"]
+    for t in transactions:
+        price = f"{t['price']:.2f}" if t["price"] is not None else "-"
+        after = f"{t['shares_after']:,.0f}" if t["shares_after"] is not None else "-"
+        code = f"{t['code']} ({CODE_NAMES.get(t['code'], 'Other')})"
+        if t["derivative"]:
+            code += " [derivative]"
+        lines.append(
+            f"{t['date']} | {t['insider']} | {t['role'] or '-'} | {code} | {'A' if t['acquired'] else 'D'} | "
+            f"{t['shares']:,.0f} | {price} | {t['value']:,.0f} | {'yes' if t['is_10b5_1'] else 'no'} | {after}"
+        )
+    return "\n".join(lines)
+
+
+def routine_result(metrics: dict) -> dict:
+    """
+    Batch result for purely routine activity, no LLM needed.
+    """
+    return {
+        "confidence_score": 50,
+        "sentiment": "Neutral",
+        "summary": "Only routine insider activity (tax withholdings and option exercises), "
+                   "with no open-market buying or selling.",
+        "reasoning": [
+            f"{metrics['transactions']} transactions, all tax withholdings or option exercises.",
+            "No open-market purchases or sales, so no signal about insider conviction.",
+            "Scored neutral without model analysis.",
+        ],
+    }
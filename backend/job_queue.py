@@ -0,0 +1,210 @@
+import contextvars
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Analysis jobs run on their own bounded pool instead of FastAPI's threadpool,
+# so slow reports can't starve cheap endpoints
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", 4))
+# Streamed (SSE) analyses hold a thread for their whole run, so they get a
+# bounded pool of their own and are refused past it
+STREAM_WORKERS = int(os.getenv("ANALYSIS_STREAM_WORKERS", 8))
+# Finished jobs kept for GET /api/jobs/{id}
+MAX_FINISHED_JOBS = 1000
+
+# Lower runs first
+PRIORITIES = {"interactive": 0, "background": 10}
+
+stage_seconds = registry.histogram("job_stage_duration_seconds", "Time analysis jobs spend queued and in each stage.",
+                                   labels=("kind", "stage"))
+
+
+class Job:
+    def __init__(self, kind: str, fn, priority: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.priority = priority
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Seconds per stage, in the order they ran
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a stage of the job: `with job.stage("fetch"): ...`
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = round(self.stages.get(name, 0) + elapsed, 4)
+            stage_seconds.observe(elapsed, kind=self.kind, stage=name)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            # HTTP status the failure maps to: 4xx for a bad request, 5xx for an upstream or server error
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stages": dict(self.stages),
+        }
+
+
+class JobQueue:
+    """
+    Priority queue of analysis jobs served by a fixed pool of worker threads.
+    A job is a function taking the Job (for stage timings) and returning a
+    JSON-serialisable result. Exceptions mark the job failed; one carrying a
+    status_code and detail (e.g. HTTPException) keeps both.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_finished: int = MAX_FINISHED_JOBS):
+        self.workers = workers
+        self.max_finished = max_finished
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._threads = []
+        self._running = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"analysis-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+        self._threads = []
+
+    def submit(self, kind: str, fn, priority: str = "interactive") -> Job:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        job = Job(kind, fn, priority)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+        # The sequence number keeps FIFO order within a priority
+        self._queue.put((PRIORITIES[priority], next(self._seq), job))
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id) or self._finished.get(job_id)
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+            job.status = "running"
+            job.started_at = time.time()
+            job.stages["queued"] = round(job.started_at - job.created_at, 4)
+            stage_seconds.observe(job.started_at - job.created_at, kind=job.kind, stage="queued")
+            try:
+                job.result = job.fn(job)
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.status_code = getattr(e, "status_code", 500)
+                job.error = str(getattr(e, "detail", e))
+                if job.status_code >= 500:
+                    logger.exception(f"{job.kind} job {job.id} failed")
+            job.finished_at = time.time()
+            job.fn = None
+            with self._lock:
+                self._running -= 1
+                self._stats["completed" if job.status == "done" else "failed"] += 1
+                del self._jobs[job.id]
+                self._finished[job.id] = job
+                while len(self._finished) > self.max_finished:
+                    self._finished.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                workers=self.workers,
+                queue_depth=self._queue.qsize(),
+                running=self._running,
+            )
+
+
+class StreamPool:
+    """
+    Bounded pool for streamed analyses. Each stream occupies a worker from its
+    fetches to its last model chunk; once every worker is busy try_submit
+    refuses (the caller answers 503) rather than queueing behind minutes-long
+    streams. fn runs in a copy of the caller's context, so request spans follow it.
+    """
+
+    def __init__(self, workers: int = STREAM_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-stream")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._stats = {"started": 0, "rejected": 0}
+
+    def try_submit(self, fn) -> bool:
+        with self._lock:
+            if self._active >= self.workers:
+                self._stats["rejected"] += 1
+                return False
+            self._active += 1
+            self._stats["started"] += 1
+
+        def run():
+            try:
+                fn()
+            except Exception:
+                logger.exception("Streamed analysis worker failed")
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        self._pool.submit(contextvars.copy_context().run, run)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, active=self._active)
+
+
+# Process-wide queue for the analysis endpoints
+jobs = JobQueue()
+# Process-wide pool for the SSE analysis endpoints
+streams = StreamPool()
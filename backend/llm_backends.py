@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Selected with LLM_BACKEND: "gemini" (default) or "fake", the offline stand-in for
+# load tests and benchmarks. Read when the backend is created, after .env is loaded.
+DEFAULT_BACKEND = "gemini"
+
+# Fake backend behaviour, overridable with LLM_FAKE_LATENCY_MS, LLM_FAKE_JITTER_MS,
+# LLM_FAKE_ERROR_RATE, LLM_FAKE_ERROR_CODES (comma-separated) and LLM_FAKE_SEED
+FAKE_LATENCY_MS = 800
+FAKE_JITTER_MS = 400
+FAKE_ERROR_RATE = 0.0
+FAKE_ERROR_CODES = [429, 503]
+FAKE_SEED = 0
+# Share of the latency spent before the first streamed chunk
+FAKE_FIRST_CHUNK_SHARE = 0.3
+FAKE_CHUNK_WORDS = 12
+
+
+class GeminiBackend:
+    """
+    google-genai client. Every backend exposes the same two calls:
+    generate() -> str and generate_stream() -> iterator of str, taking the
+    model name, the prompt, a per-request timeout in seconds and generation
+    options (temperature, json_output).
+    """
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        from google import genai
+        self.client = genai.Client(api_key=api_key)
+
+    def _config(self, timeout: float, temperature: float = None, json_output: bool = False):
+        from google.genai import types
+        return types.GenerateContentConfig(
+            temperature=temperature,
+            response_mime_type="application/json" if json_output else None,
+            # Milliseconds for the SDK
+            http_options=types.HttpOptions(timeout=int(timeout * 1000)) if timeout else None,
+        )
+
+    def generate(self, model: str, prompt: str, timeout: float = None, **options) -> str:
+        response = self.client.models.generate_content(model=model, contents=prompt,
+                                                       config=self._config(timeout, **options))
+        return response.text
+
+    def generate_stream(self, model: str, prompt: str, timeout: float = None, **options):
+        for chunk in self.client.models.generate_content_stream(model=model, contents=prompt,
+                                                                config=self._config(timeout, **options)):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackendError(Exception):
+    """
+    Injected failure; carries an HTTP status in .code like the SDK's APIError.
+    """
+
+    def __init__(self, code: int):
+        super().__init__(f"{code} injected by the fake LLM backend")
+        self.code = code
+
+
+class FakeBackend:
+    """
+    Offline stand-in: no network, no quota. Answers are deterministic for a
+    given prompt and have the shape the analyzer expects (markdown filing notes,
+    the five-section company report, or the batch JSON). Latency, jitter and
+    error injection are configurable, and a latency over the request timeout
+    raises TimeoutError like a real hung call.
+    """
+    name = "fake"
+
+    def __init__(self, latency_ms: float = FAKE_LATENCY_MS, jitter_ms: float = FAKE_JITTER_MS,
+                 error_rate: float = FAKE_ERROR_RATE, error_codes: list = None, seed: int = FAKE_SEED):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_codes = error_codes or FAKE_ERROR_CODES
+        # Latency and errors come from a seeded generator so a load test run is repeatable
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self):
+        with self._lock:
+            latency = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            error = self._rng.choice(self.error_codes) if self._rng.random() < self.error_rate else None
+        return latency, error
+
+    def _wait(self, seconds: float, timeout: float):
+        if timeout and seconds > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Fake LLM call exceeded {timeout}s")
+        time.sleep(seconds)
+
+    def generate(self, model: str, prompt: str, timeout: float = None, **options) -> str:
+        latency, error = self._draw()
+        self._wait(latency, timeout)
+        if error:
+            raise FakeBackendError(error)
+        return fake_response(prompt, **options)
+
+    def generate_stream(self, model: str, prompt: str, timeout: float = None, **options):
+        latency, error = self._draw()
+        self._wait(latency * FAKE_FIRST_CHUNK_SHARE, timeout)
+        if error:
+            raise FakeBackendError(error)
+        words = fake_response(prompt, **options).split(" ")
+        chunks = [" ".join(words[i:i + FAKE_CHUNK_WORDS]) for i in range(0, len(words), FAKE_CHUNK_WORDS)]
+        pause = latency * (1 - FAKE_FIRST_CHUNK_SHARE) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(pause)
+            yield chunk + (" " if i < len(chunks) - 1 else "")
+
+
+def fake_response(prompt: str, temperature: float = None, json_output: bool = False) -> str:
+    """
+    Deterministic, schema-valid answer for one of the analyzer's prompts.
+    """
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    ticker_match = re.search(r"\b(?:for|on) ([A-Z][A-Z.\-]{0,9})\b", prompt)
+    ticker = ticker_match.group(1) if ticker_match else "the company"
+
+    if json_output:
+        score = rng.randint(0, 100)
+        sentiment = "Bullish" if score >= 60 else "Bearish" if score <= 40 else "Neutral"
+        return json.dumps({
+            "confidence_score": score,
+            "sentiment": sentiment,
+            "summary": f"Offline stand-in result for {ticker}. Insider activity scored {score}/100.",
+            "reasoning": [f"Synthetic factor {i + 1} ({rng.choice(['buying', 'selling', 'plan trades', 'option exercises'])})"
+                          for i in range(3)],
+        })
+
+    if "Comprehensive Analysis" in prompt:
+        sections = ["1. Executive Summary", "2. Core Financial Review (Latest 10-K/10-Q)",
+                    "3. Recent Developments (8-Ks)", "4. Risk Assessment", "5. Investment Verdict"]
+        body = "\n\n".join(f"## {s}\n{_fake_paragraph(rng)}" for s in sections)
+        return f"# {ticker} Comprehensive Analysis\n\n{body}\n"
+
+    return "\n".join(f"- **{topic}:** {_fake_paragraph(rng, sentences=1)}" for topic in
+                     ["Actionable information", "Risks", "Financial health", "Leadership"])
+
+
+FAKE_WORDS = ("revenue guidance margin outlook segment demand liquidity litigation supply "
+              "headcount buyback dividend acquisition regulatory forecast").split()
+
+
+def _fake_paragraph(rng: random.Random, sentences: int = 3) -> str:
+    return " ".join(
+        " ".join(rng.choice(FAKE_WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def create_backend():
+    """
+    The backend selected by LLM_BACKEND, or None when it can't be set up
+    (e.g. no GEMINI_API_KEY).
+    """
+    name = os.getenv("LLM_BACKEND", DEFAULT_BACKEND)
+    if name == "fake":
+        logger.info("Using the fake LLM backend (LLM_BACKEND=fake)")
+        codes = os.getenv("LLM_FAKE_ERROR_CODES")
+        return FakeBackend(
+            latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", FAKE_LATENCY_MS)),
+            jitter_ms=float(os.getenv("LLM_FAKE_JITTER_MS", FAKE_JITTER_MS)),
+            error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", FAKE_ERROR_RATE)),
+            error_codes=[int(c) for c in codes.split(",") if c.strip()] if codes else None,
+            seed=int(os.getenv("LLM_FAKE_SEED", FAKE_SEED)),
+        )
+    if name != "gemini":
+        logger.error(f"Unknown LLM_BACKEND {name!r}, expected 'gemini' or 'fake'")
+        return None
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        logger.warning("GEMINI_API_KEY not found in environment variables. Analysis will fail.")
+        return None
+    try:
+        return GeminiBackend(api_key)
+    except Exception as e:
+        logger.error(f"Failed to initialize Gemini client: {e}")
+        return None
@@ -0,0 +1,295 @@
+import logging
+import os
+import random
+import threading
+import time
+
+from edgar_client import TokenBucket
+from token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Concurrent LLM calls across the whole process (map steps, jobs, streams)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+# Per-model quotas. QPS backs off on 429s and creeps back up on success (AIMD).
+LLM_MAX_QPS = float(os.getenv("LLM_MAX_QPS", 4))
+LLM_MIN_QPS = 0.1
+LLM_QPS_INCREASE = 0.05
+LLM_QPS_DECREASE = 0.5
+LLM_TPM = int(os.getenv("LLM_TPM", 1000000))
+# Tokens reserved for the response when charging the TPM bucket
+OUTPUT_TOKENS_ESTIMATE = 2000
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 120))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Consecutive upstream failures that open the circuit, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+
+
+class LLMError(Exception):
+    """
+    A failed LLM call. retryable is set for throttling, upstream and network errors.
+    """
+
+    def __init__(self, message: str, status_code: int = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class CircuitOpenError(LLMError):
+    pass
+
+
+def classify_error(error: Exception) -> LLMError:
+    """
+    Map an SDK/transport exception to an LLMError.
+    """
+    if isinstance(error, LLMError):
+        return error
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return LLMError(str(error), status_code=code, retryable=code == 429 or code >= 500)
+    # httpx timeouts and connection errors don't carry a status code
+    name = type(error).__name__
+    if "Timeout" in name or "Connect" in name or isinstance(error, (TimeoutError, ConnectionError)):
+        return LLMError(f"{name}: {error}", status_code=504 if "Timeout" in name else 502, retryable=True)
+    return LLMError(str(error))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive upstream failures and fails fast for
+    `reset_seconds`; then lets one trial call through (half-open), closing
+    again on success.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at >= self.reset_seconds and not self._trial:
+                self._trial = True
+                return
+        raise CircuitOpenError("LLM circuit open: upstream failing, not calling it", status_code=503)
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial = False
+
+    def release_trial(self):
+        """
+        End a half-open trial that finished without telling us anything (the
+        caller gave up first), so the next call can be the trial instead.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial or self._consecutive >= self.failures:
+                if self._opened_at is None or self._trial:
+                    logger.warning(f"LLM circuit opened after {self._consecutive} consecutive failures")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class _ModelLimits:
+    def __init__(self, max_qps: float, tpm: int):
+        self.max_qps = max_qps
+        self.qps = max_qps
+        self.requests = TokenBucket(max_qps)
+        self.tokens = TokenBucket(tpm / 60.0, capacity=tpm)
+        self._lock = threading.Lock()
+
+    def throttled(self):
+        with self._lock:
+            self.qps = max(LLM_MIN_QPS, self.qps * LLM_QPS_DECREASE)
+            self.requests.set_rate(self.qps)
+
+    def succeeded(self):
+        with self._lock:
+            if self.qps < self.max_qps:
+                self.qps = min(self.max_qps, self.qps + LLM_QPS_INCREASE)
+                self.requests.set_rate(self.qps)
+
+
+class LLMGateway:
+    """
+    The one way analyses reach the model: a global concurrency bound, per-model
+    QPS and tokens-per-minute buckets, AIMD backoff on 429s, request timeouts,
+    retries with jittered backoff, and a circuit breaker. Raises LLMError; an
+    empty response is an error too, so callers never cache a failure.
+
+    backend is one of llm_backends (Gemini or the offline fake).
+    """
+
+    def __init__(self, backend, max_concurrency: int = LLM_MAX_CONCURRENCY, max_qps: float = LLM_MAX_QPS,
+                 tpm: int = LLM_TPM, timeout: float = LLM_TIMEOUT_SECONDS, max_retries: int = LLM_MAX_RETRIES):
+        self.backend = backend
+        self.max_qps = max_qps
+        self.tpm = tpm
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._models = {}
+        self._active = 0
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "throttled": 0,
+            "rejected": 0,
+            "rate_wait_seconds": 0.0,
+            "concurrency_wait_seconds": 0.0,
+        }
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _limits(self, model: str) -> _ModelLimits:
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = _ModelLimits(self.max_qps, self.tpm)
+            return self._models[model]
+
+    def _admit(self, model: str, prompt: str) -> _ModelLimits:
+        """
+        Wait for the rate limits, then a concurrency slot. The caller must release the slot.
+        """
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        limits = self._limits(model)
+        waited = limits.requests.acquire()
+        waited += limits.tokens.acquire(min(limits.tokens.capacity, count_tokens(prompt) + OUTPUT_TOKENS_ESTIMATE))
+        self._count("rate_wait_seconds", waited)
+        start = time.monotonic()
+        self._semaphore.acquire()
+        self._count("concurrency_wait_seconds", time.monotonic() - start)
+        with self._lock:
+            self._active += 1
+            self._stats["requests"] += 1
+        return limits
+
+    def _leave(self):
+        with self._lock:
+            self._active -= 1
+        self._semaphore.release()
+
+    def _failed(self, limits: _ModelLimits, error: LLMError, attempt: int, can_retry: bool = True) -> float:
+        """
+        Record a failure. Returns the delay before retrying, or raises if we shouldn't.
+        """
+        self._count("errors")
+        if error.status_code == 429:
+            self._count("throttled")
+            limits.throttled()
+        # Only outages (5xx, timeouts, connection errors) trip the breaker; a 429 or a
+        # rejected request still means the upstream is up
+        if error.retryable and error.status_code != 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if not (error.retryable and can_retry) or attempt >= self.max_retries:
+            raise error
+        self._count("retries")
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def _succeeded(self, limits: _ModelLimits):
+        self.breaker.record_success()
+        limits.succeeded()
+
+    def generate(self, model: str, prompt: str, **options) -> str:
+        """
+        options are passed to the backend (temperature, json_output).
+        """
+        attempt = 0
+        while True:
+            limits = self._admit(model, prompt)
+            try:
+                text = self.backend.generate(model, prompt, timeout=self.timeout, **options)
+                if not text:
+                    raise LLMError("Empty response from model", status_code=502)
+            except Exception as e:
+                error = classify_error(e)
+                delay = self._failed(limits, error, attempt)
+                logger.warning(f"LLM call failed ({error}), retrying in {delay:.1f}s")
+            else:
+                self._succeeded(limits)
+                return text
+            finally:
+                self._leave()
+            attempt += 1
+            time.sleep(delay)
+
+    def generate_stream(self, model: str, prompt: str, **options):
+        """
+        Yield response text as it arrives. Retries only before the first chunk.
+        """
+        attempt = 0
+        while True:
+            limits = self._admit(model, prompt)
+            produced = False
+            try:
+                for text in self.backend.generate_stream(model, prompt, timeout=self.timeout, **options):
+                    produced = True
+                    yield text
+                if not produced:
+                    raise LLMError("Empty response from model", status_code=502)
+            except GeneratorExit:
+                # The consumer stopped reading. Chunks arriving means the upstream
+                # is healthy; otherwise we learned nothing, but a half-open trial
+                # must not stay claimed forever.
+                if produced:
+                    self._succeeded(limits)
+                else:
+                    self.breaker.release_trial()
+                raise
+            except Exception as e:
+                error = classify_error(e)
+                delay = self._failed(limits, error, attempt, can_retry=not produced)
+                logger.warning(f"LLM stream failed ({error}), retrying in {delay:.1f}s")
+            else:
+                self._succeeded(limits)
+                return
+            finally:
+                self._leave()
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, backend=self.backend.name, active=self._active,
+                         max_concurrency=self.max_concurrency)
+            stats["models"] = {name: {"qps": round(m.qps, 3), "max_qps": m.max_qps} for name, m in self._models.items()}
+        stats["circuit"] = self.breaker.state
+        return stats
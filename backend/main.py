@@ -1,12 +1,23 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
+import threading
+import time
 from contextlib import asynccontextmanager
 
-from scraper import get_recent_filings, get_filing_text
+from scraper import (get_recent_filings, get_filing_text, get_filing_texts, get_ownerships, text_budget, get_cik,
+                     sync_filings, stored_filings, latest_stored_filing)
 from analyzer import analyze_filing
-from monitor import start_monitor, add_ticker_to_monitor
+from monitor import start_monitor, stop_monitor, add_ticker_to_monitor, record_filings
+from feed_bus import bus
+from feed_index import feed_index
+from job_queue import jobs, streams, PRIORITIES
+from metrics import (registry, request_seconds, start_request, request_spans, stage_totals, server_timing,
+                     Counter, Gauge, SERVER_TIMING)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +28,12 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up SEC Scraper Backend...")
     start_monitor()
+    jobs.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    stop_monitor()
+    jobs.stop()
 
 app = FastAPI(title="SEC Insight API", lifespan=lifespan)
 
@@ -32,6 +46,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_timing(request: Request, call_next):
+    """
+    Request latency histogram, and the Server-Timing header when SERVER_TIMING is on.
+    Streamed bodies are timed up to their headers; SSE analyses report their stages in 'done'.
+    """
+    spans = start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # Route templates, not raw paths, so job ids don't explode the label set
+    route = request.scope.get("route")
+    request_seconds.observe(elapsed, method=request.method, route=route.path if route else "unmatched",
+                            status=response.status_code)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(spans, elapsed)
+    return response
+
 class TickerRequest(BaseModel):
     ticker: str
 
@@ -52,92 +84,227 @@ def track_ticker(request: TickerRequest):
     
     # Return initial data
     filings = get_recent_filings(ticker)
+    record_filings(filings)
     return {"ticker": ticker, "recent_filings": filings}
 
-@app.post("/api/analyze")
-def analyze_specific_filing(url: str, ticker: str, form: str):
+def _submit(kind: str, run, priority: str) -> dict:
     """
-    Trigger on-demand analysis of a specific filing URL.
+    Queue an analysis job; the client polls GET /api/jobs/{id} for the result.
     """
-    logger.info(f"Analyzing {form} for {ticker}...")
-    text = get_filing_text(url)
-    if not text:
-        raise HTTPException(status_code=400, detail="Could not retrieve text from URL")
-        
-    analysis = analyze_filing(ticker, form, text)
-    return {"analysis": analysis}
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITIES)}")
+    job = jobs.submit(kind, run, priority)
+    return {"job_id": job.id, "status": job.status}
+
+@app.post("/api/analyze", status_code=202)
+async def analyze_specific_filing(url: str, ticker: str, form: str, priority: str = "interactive"):
+    """
+    Queue on-demand analysis of a specific filing URL.
+    """
+    def run(job):
+        logger.info(f"Analyzing {form} for {ticker}...")
+        with job.stage("fetch"):
+            text = get_filing_text(url, max_chars=text_budget(form))
+        if not text:
+            raise HTTPException(status_code=400, detail="Could not retrieve text from URL")
+
+        with job.stage("analyze"):
+            analysis = analyze_filing(ticker, form, text)
+        return {"analysis": analysis}
+
+    return _submit("analyze", run, priority)
 
 class CompanyAnalysisRequest(BaseModel):
     ticker: str
 
-@app.post("/api/analyze-company")
-def analyze_company(request: CompanyAnalysisRequest):
+# Forms a company analysis reads, and how many 10-Qs/8-Ks since the 10-K at most
+COMPANY_FORMS = ("10-K", "10-Q", "8-K")
+COMPANY_MAX_10QS = 4
+COMPANY_MAX_8KS = 10
+
+def _filing_key(f: dict) -> tuple:
+    return f['filingDate'], f['accessionNumber']
+
+def collect_company_filings(ticker: str) -> list:
     """
-    Perform a comprehensive analysis of the company based on recent filings.
+    The latest 10-K, the 10-Qs and the most recent 8-Ks filed since it, with their text.
+    Raises HTTPException when there is nothing to analyze.
     """
-    ticker = request.ticker.upper()
-    logger.info(f"Starting comprehensive analysis for {ticker}")
-    
-    # 1. Fetch recent filings (enough history to find 10-K)
-    filings = get_recent_filings(ticker, limit=100)
-    if not filings:
+    cik = get_cik(ticker)
+    if not cik:
         raise HTTPException(status_code=404, detail="No filings found for ticker")
-        
-    # 2. Filter logic: Find latest 10-K and all subsequent 8-Ks/10-Qs
-    relevant_filings = []
-    found_10k_or_10q = False
-    
-    # Iterate through chronological filings (they are usually sorted desc already)
-    # We want the *latest* 10-K or 10-Q as a base, and all 8-Ks since then?
-    # Actually, let's grab the latest 10-K (Annual) as the base foundation.
-    # And include 10-Qs and 8-Ks filed *after* it.
-    
-    latest_10k_index = -1
-    for i, f in enumerate(filings):
-        if f['form'] == '10-K':
-            latest_10k_index = i
-            break
-            
-    if latest_10k_index != -1:
-        # Everything before the 10-K (index 0 to i) are newer
-        # Include the 10-K itself
-        candidates = filings[:latest_10k_index+1]
-        
-        # Filter for 10-K, 10-Q, 8-K only
-        for f in candidates:
-            if f['form'] in ['10-K', '10-Q', '8-K']:
-                relevant_filings.append(f)
+
+    # 1. Bring the local filing store up to date (usually a 304 from EDGAR)
+    sync_filings(cik)
+
+    # 2. The latest 10-K (Annual) as the base foundation, plus every 10-Q and
+    # up to COMPANY_MAX_8KS 8-Ks filed after it: indexed lookups, each bounded
+    latest_10k = latest_stored_filing(cik, "10-K")
+    if latest_10k:
+        after_10k = _filing_key(latest_10k)
+        # At most three 10-Qs follow a 10-K; the limit only guards against odd histories
+        quarterly, _ = stored_filings(cik, forms=["10-Q"], since=latest_10k['filingDate'], limit=COMPANY_MAX_10QS)
+        current, _ = stored_filings(cik, forms=["8-K"], since=latest_10k['filingDate'], limit=COMPANY_MAX_8KS)
+        # since= is a whole day; drop same-day filings that came before the 10-K
+        later = [f for f in quarterly + current if _filing_key(f) > after_10k]
+        relevant_filings = sorted(later + [latest_10k], key=_filing_key, reverse=True)
     else:
-        # No 10-K found in recent list? Fallback to just taking the most recent relevant 5 docs
-        logger.warning(f"No 10-K found for {ticker} in recent 100 filings. Using generic recent set.")
-        count = 0
-        for f in filings:
-            if f['form'] in ['10-K', '10-Q', '8-K']:
-                relevant_filings.append(f)
-                count += 1
-            if count >= 5: break
-            
+        # No 10-K on record? Fallback to just taking the most recent relevant 5 docs
+        logger.warning(f"No 10-K found for {ticker}. Using generic recent set.")
+        relevant_filings, _ = stored_filings(cik, forms=COMPANY_FORMS, limit=5)
+
     if not relevant_filings:
         raise HTTPException(status_code=404, detail="No relevant filings (10-K/Q/8-K) found.")
 
     logger.info(f"Selected {len(relevant_filings)} docs for analysis.")
     
-    # 3. Retrieve content
+    # 3. Retrieve content (concurrently, results come back in input order)
     filing_data_list = []
-    for f in relevant_filings:
-        text = get_filing_text(f['url'])
-        if text:
+    fetched = get_filing_texts([f['url'] for f in relevant_filings],
+                               max_chars=[text_budget(f['form']) for f in relevant_filings])
+    for f, result in zip(relevant_filings, fetched):
+        if result['text']:
             filing_data_list.append({
                 'form': f['form'],
                 'filingDate': f['filingDate'],
                 'accessionNumber': f['accessionNumber'], # Important for cache key stability
-                'content': text
+                'content': result['text']
             })
             
-    # 4. Analyze
-    from analyzer import analyze_company_comprehensive
-    report = analyze_company_comprehensive(ticker, filing_data_list)
-    return {"report": report}
+    return filing_data_list
+
+@app.post("/api/analyze-company", status_code=202)
+async def analyze_company(request: CompanyAnalysisRequest, priority: str = "interactive"):
+    """
+    Queue a comprehensive analysis of the company based on recent filings.
+    """
+    ticker = request.ticker.upper()
+
+    def run(job):
+        logger.info(f"Starting comprehensive analysis for {ticker}")
+        with job.stage("fetch"):
+            filing_data_list = collect_company_filings(ticker)
+
+        # 4. Analyze
+        from analyzer import analyze_company_comprehensive
+        with job.stage("analyze"):
+            report = analyze_company_comprehensive(ticker, filing_data_list)
+        return {"report": report}
+
+    return _submit("analyze-company", run, priority)
+
+def _analysis_events(prepare, stream):
+    """
+    The SSE events of one streamed analysis: 'status' events while the filings
+    are fetched, one 'chunk' per piece of markdown, then 'done' (with time to
+    first token) or 'error'. prepare() returns the arguments for stream().
+    Blocking; runs on the stream pool.
+    """
+    from analyzer import AnalysisError
+
+    started = time.perf_counter()
+    first_token = None
+    yield _format_sse({"event": "status", "data": {"stage": "fetching"}})
+    chunks = None
+    try:
+        args = prepare()
+        yield _format_sse({"event": "status", "data": {"stage": "analyzing"}})
+        chunks = stream(*args)
+        for text in chunks:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            yield _format_sse({"event": "chunk", "data": {"text": text}})
+    except HTTPException as e:
+        yield _format_sse({"event": "error", "data": {"detail": e.detail}})
+        return
+    except AnalysisError as e:
+        yield _format_sse({"event": "error", "data": {"detail": str(e)}})
+        return
+    except Exception as e:
+        logger.exception("Streamed analysis failed")
+        yield _format_sse({"event": "error", "data": {"detail": f"Analysis failed: {e}"}})
+        return
+    finally:
+        # A client that went away closes us mid-stream; the analyzer finishes (and caches) the rest
+        if chunks is not None:
+            chunks.close()
+    yield _format_sse({"event": "done", "data": {
+        "time_to_first_token_ms": round((first_token or 0) * 1000),
+        "total_ms": round((time.perf_counter() - started) * 1000),
+        "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in stage_totals(request_spans()).items()},
+    }})
+
+def _analysis_stream(prepare, stream) -> StreamingResponse:
+    """
+    Streams _analysis_events as text/event-stream. The blocking work runs on the
+    bounded stream pool and hands events to the response through an asyncio.Queue,
+    so long model streams never hold Starlette's threadpool; past the pool's
+    limit the request gets a 503.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    closed = threading.Event()
+
+    def put(event) -> bool:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+            return True
+        except RuntimeError:
+            # The event loop is gone (shutdown)
+            return False
+
+    def produce():
+        events = _analysis_events(prepare, stream)
+        try:
+            for event in events:
+                if closed.is_set() or not put(event):
+                    break
+        finally:
+            events.close()
+            put(None)
+
+    if not streams.try_submit(produce):
+        raise HTTPException(status_code=503, detail="Too many analyses streaming, try again shortly",
+                            headers={"Retry-After": "5"})
+
+    async def body():
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            closed.set()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/analyze/stream")
+async def stream_specific_filing(url: str, ticker: str, form: str):
+    """
+    Streaming variant of /api/analyze (GET, so EventSource can consume it).
+    """
+    from analyzer import stream_filing_analysis
+
+    def prepare():
+        text = get_filing_text(url, max_chars=text_budget(form))
+        if not text:
+            raise HTTPException(status_code=400, detail="Could not retrieve text from URL")
+        return ticker, form, text
+
+    logger.info(f"Streaming analysis of {form} for {ticker}...")
+    return _analysis_stream(prepare, stream_filing_analysis)
+
+@app.get("/api/analyze-company/stream")
+async def stream_company_analysis_endpoint(ticker: str):
+    """
+    Streaming variant of /api/analyze-company (GET, so EventSource can consume it).
+    """
+    from analyzer import stream_company_analysis
+    ticker = ticker.upper()
+    logger.info(f"Streaming comprehensive analysis for {ticker}")
+    return _analysis_stream(lambda: (ticker, collect_company_filings(ticker)), stream_company_analysis)
 
 
 
@@ -152,59 +319,199 @@ class BatchAnalysisRequest(BaseModel):
     ticker: str
     filings: list[FilingMetadata]
 
-@app.post("/api/analyze-batch")
-def analyze_filings_batch_endpoint(request: BatchAnalysisRequest):
+@app.post("/api/analyze-batch", status_code=202)
+async def analyze_filings_batch_endpoint(request: BatchAnalysisRequest, priority: str = "interactive"):
     """
-    Analyze a batch of filings.
+    Queue analysis of a batch of filings.
     """
     ticker = request.ticker.upper()
-    logger.info(f"Received batch analysis request for {ticker} with {len(request.filings)} filings")
+
+    def run(job):
+        logger.info(f"Received batch analysis request for {ticker} with {len(request.filings)} filings")
     
-    filings_list = []
-    for f in request.filings:
-        text = get_filing_text(f.url)
-        if text:
-            filings_list.append({
+        # Form 4s are parsed from their ownership XML; anything else, or any
+        # Form 4 whose XML can't be fetched or parsed, falls back to its text
+        with job.stage("fetch"):
+            ownership_filings = [f for f in request.filings if f.form.split('/')[0] == '4']
+            ownerships = {f.url: r['ownership'] for f, r in zip(ownership_filings, get_ownerships([f.url for f in ownership_filings]))}
+            text_filings = [f for f in request.filings if not ownerships.get(f.url)]
+            texts = {f.url: r['text'] for f, r in zip(text_filings, get_filing_texts([f.url for f in text_filings]))}
+
+        filings_list = []
+        for f in request.filings:
+            filing = {
                 'form': f.form,
                 'filingDate': f.filingDate,
                 'accessionNumber': f.accessionNumber,
-                'content': text
-            })
+            }
+            if ownerships.get(f.url):
+                filings_list.append(dict(filing, ownership=ownerships[f.url]))
+            elif texts.get(f.url):
+                filings_list.append(dict(filing, content=texts[f.url]))
             
-    if not filings_list:
-         raise HTTPException(status_code=400, detail="Could not retrieve text for any filings")
+        if not filings_list:
+            raise HTTPException(status_code=400, detail="Could not retrieve text for any filings")
          
-    import json
-    import re
-    from analyzer import analyze_filings_batch
+        from analyzer import analyze_filings_batch
 
-    report = analyze_filings_batch(ticker, filings_list)
+        with job.stage("analyze"):
+            report = analyze_filings_batch(ticker, filings_list)
     
-    # analyzer.py now returns a JSON string. 
-    # We should try to parse it to return a proper JSON object to frontend.
-    try:
-        # Robust JSON extraction
-        # Find the first { and last }
-        start_index = report.find('{')
-        end_index = report.rfind('}')
+        # analyzer.py now returns a JSON string. 
+        # We should try to parse it to return a proper JSON object to frontend.
+        try:
+            # Robust JSON extraction
+            # Find the first { and last }
+            start_index = report.find('{')
+            end_index = report.rfind('}')
         
-        if start_index != -1 and end_index != -1:
-            json_str = report[start_index:end_index+1]
-            analysis_data = json.loads(json_str)
-            return {"analysis": analysis_data}
+            if start_index != -1 and end_index != -1:
+                json_str = report[start_index:end_index+1]
+                analysis_data = json.loads(json_str)
+                return {"analysis": analysis_data}
+            else:
+                raise ValueError("No JSON object found in response")
+
+        except Exception as e:
+            logger.warning(f"Failed to parse JSON from batch analysis: {e}")
+            # Fallback for old text format or errors
+            return {"analysis": {
+                "confidence_score": 50,
+                "sentiment": "Neutral",
+                "summary": "Failed to parse analysis results.",
+                "reasoning": [str(e)]
+            }}
+
+    return _submit("analyze-batch", run, priority)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status, stage timings and (once done) the result of an analysis job.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+@app.get("/api/stats")
+def get_stats():
+    """
+    Cache and upstream counters, for tuning.
+    """
+    from cache_store import cache
+    from edgar_client import edgar
+    from scraper import submissions_cache
+    from analyzer import budget_stats, gateway
+    from single_flight import analysis_flight, fetch_flight
+    from price_store import prices
+    return {
+        "cache": cache.stats(),
+        "edgar": edgar.stats(),
+        "submissions": submissions_cache.stats(),
+        "prompt_budget": budget_stats(),
+        "single_flight": {"analysis": analysis_flight.stats(), "fetch": fetch_flight.stats()},
+        "jobs": jobs.stats(),
+        "streams": streams.stats(),
+        "llm": gateway.stats() if gateway else None,
+        "prices": prices.stats(),
+    }
+
+def _stats_metrics(name: str, help: str, metric_type, values: dict, label: str) -> list:
+    """
+    One Counter or Gauge with a sample per stats entry, labelled by its key.
+    """
+    metric = metric_type(name, help, labels=(label,))
+    for key, value in values.items():
+        if metric_type is Gauge:
+            metric.set(value, **{label: key})
         else:
-            raise ValueError("No JSON object found in response")
+            metric.inc(value, **{label: key})
+    return [metric]
 
-    except Exception as e:
-        logger.warning(f"Failed to parse JSON from batch analysis: {e}")
-        # Fallback for old text format or errors
-        return {"analysis": {
-            "confidence_score": 50,
-            "sentiment": "Neutral",
-            "summary": "Failed to parse analysis results.",
-            "reasoning": [str(e)]
-        }}
+@registry.collector
+def collect_stats() -> list:
+    """
+    Exports the counters the modules already keep (see /api/stats) at scrape time.
+    """
+    from cache_store import cache
+    from edgar_client import edgar
+    from scraper import submissions_cache
+    from analyzer import gateway
+    from single_flight import analysis_flight, fetch_flight
+    from monitor import get_tracked_tickers
+
+    metrics = []
+    cache_stats = cache.stats()
+    lookups = Counter("cache_lookups_total", "Cache lookups by namespace and result; hit ratio = hit / (hit + miss).",
+                      labels=("namespace", "result"))
+    for namespace, counts in cache_stats["namespaces"].items():
+        lookups.inc(counts["hits"], namespace=namespace, result="hit")
+        lookups.inc(counts["misses"], namespace=namespace, result="miss")
+    metrics.append(lookups)
+    metrics += _stats_metrics("cache_events_total", "Cache writes, evictions and errors.", Counter,
+                              {k: cache_stats[k] for k in ("memory_hits", "writes", "evictions", "errors")}, "event")
+    metrics += _stats_metrics("cache_bytes", "Cache size on disk and in memory.", Gauge,
+                              {"disk": cache_stats["bytes"], "memory": cache_stats.get("memory_bytes", 0)}, "tier")
+
+    edgar_stats = edgar.stats()
+    metrics += _stats_metrics("edgar_events_total", "EDGAR client requests, retries, errors and throttle waits.", Counter,
+                              {k: edgar_stats[k] for k in ("requests", "retries", "errors", "throttle_waits")}, "event")
+    metrics += _stats_metrics("edgar_bytes_total", "Bytes downloaded from EDGAR.", Counter,
+                              {"body": edgar_stats["bytes"]}, "kind")
+    metrics += _stats_metrics("submissions_lookups_total", "Submissions cache lookups by outcome.", Counter,
+                              submissions_cache.stats(), "result")
+
+    flights = Counter("single_flight_total", "Coalescing: calls, executions, coalesced callers and errors.",
+                      labels=("flight", "event"))
+    for flight in (analysis_flight, fetch_flight):
+        for event, value in flight.stats().items():
+            if event != "in_flight":
+                flights.inc(value, flight=flight.name, event=event)
+    metrics.append(flights)
+
+    job_stats = jobs.stats()
+    metrics += _stats_metrics("jobs_total", "Analysis jobs submitted, completed and failed.", Counter,
+                              {k: job_stats[k] for k in ("submitted", "completed", "failed")}, "event")
+    metrics += _stats_metrics("jobs", "Analysis jobs waiting and running.", Gauge,
+                              {"queued": job_stats["queue_depth"], "running": job_stats["running"]}, "state")
+    stream_stats = streams.stats()
+    metrics += _stats_metrics("analysis_streams_total", "Streamed analyses started and refused at the limit.", Counter,
+                              {k: stream_stats[k] for k in ("started", "rejected")}, "event")
+    active = Gauge("analysis_streams_active", "Streamed analyses in progress.")
+    active.set(stream_stats["active"])
+    metrics.append(active)
+
+    if gateway:
+        llm_stats = gateway.stats()
+        metrics += _stats_metrics("llm_events_total", "LLM gateway requests, retries, errors, 429s and breaker rejections.",
+                                  Counter, {k: llm_stats[k] for k in ("requests", "retries", "errors", "throttled",
+                                                                      "rejected")}, "event")
+        circuit = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open or half-open.", labels=("backend",))
+        circuit.set(int(llm_stats["circuit"] != "closed"), backend=llm_stats["backend"])
+        metrics.append(circuit)
+
+    from price_store import prices
+    metrics += _stats_metrics("price_requests_total", "Price history requests served locally, refreshed, or stale.", Counter,
+                              {k: v for k, v in prices.stats().items() if k not in ("tickers", "source")}, "result")
 
+    subscribers = Gauge("feed_subscribers", "Clients connected to /api/feed/stream.")
+    subscribers.set(bus.subscriber_count())
+    metrics.append(subscribers)
+
+    tracked = Gauge("tracked_tickers", "Tickers the monitor is watching.")
+    tracked.set(len(get_tracked_tickers()))
+    metrics.append(tracked)
+    return metrics
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus text exposition of stage timings, request latency and the counters in /api/stats.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/api/tracked")
 def get_tracked_tickers_endpoint():
@@ -215,60 +522,118 @@ def get_tracked_tickers_endpoint():
     return {"tickers": get_tracked_tickers()}
 
 @app.get("/api/feed")
-def get_feed():
-    # Placeholder for checking if there are new notifications
-    # In a real app, use SSE or Websockets
-    from monitor import get_recent_filings, get_tracked_tickers
-    
-    # Simple feed implementation: Get most recent filing for each ticker
-    # This is inefficient for production but fine for hackathon
-    feed_items = []
-    for ticker in get_tracked_tickers():
-         filings = get_recent_filings(ticker)
-         if filings:
-             for f in filings[:3]: # Top 3 per company
-                 f['ticker'] = ticker # Add ticker context
-                 feed_items.append(f)
-    
-    # Sort by date desc
-    feed_items.sort(key=lambda x: x['filingDate'], reverse=True)
-    return {"updates": feed_items[:20]}
+def get_feed(limit: int = 20, since: str = None, forms: str = None, cursor: str = None):
+    """
+    Recent filings across all tracked tickers, newest first.
+    Served from the materialized feed the monitor keeps up to date, no EDGAR calls.
+    since: YYYY-MM-DD, forms: comma-separated form types, cursor: next_cursor from the previous page.
+    Live updates are pushed over /api/feed/stream.
+    """
+    limit = max(1, min(limit, 200))
+    form_list = [f.strip() for f in forms.split(",") if f.strip()] if forms else None
+    items, next_cursor = feed_index.query(limit=limit, since=since, forms=form_list, cursor=cursor)
+    return {"updates": items, "next_cursor": next_cursor}
+
+@app.get("/api/filings")
+def get_filings(ticker: str = None, forms: str = None, since: str = None, until: str = None, limit: int = 20,
+                cursor: str = None):
+    """
+    Filing history from the local filing store, newest first.
+    ticker: one company, synced with EDGAR on the first page (omit to query every stored company),
+    forms: comma-separated form types, since/until: YYYY-MM-DD (inclusive),
+    cursor: next_cursor from the previous page.
+    """
+    from filing_store import DATE_RE
+
+    limit = max(1, min(limit, 200))
+    for name, value in (("since", since), ("until", until)):
+        if value and not DATE_RE.match(value):
+            raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD")
+    form_list = [f.strip() for f in forms.split(",") if f.strip()] if forms else None
+
+    cik = None
+    if ticker:
+        ticker = ticker.upper()
+        cik = get_cik(ticker)
+        if not cik:
+            raise HTTPException(status_code=404, detail=f"Unknown ticker {ticker}")
+        # Later pages continue from what the first one saw
+        if not cursor:
+            sync_filings(cik)
+
+    try:
+        items, next_cursor = stored_filings(cik, forms=form_list, since=since, until=until, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"filings": items, "next_cursor": next_cursor}
+
+# Comment line sent when there's nothing to say, keeps proxies from closing idle streams
+SSE_KEEPALIVE_SECONDS = 15
+
+def _format_sse(event: dict) -> str:
+    event_id = f"id: {event['id']}\n" if event.get('id') is not None else ""
+    return f"{event_id}event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+@app.get("/api/feed/stream")
+async def feed_stream(request: Request, last_event_id: str = Header(None), since: str = None):
+    """
+    Server-Sent Events stream of new filings detected by the monitor.
+    Reconnecting clients resume from the Last-Event-ID header (or ?since=<id>).
+    Served entirely from memory, no EDGAR calls.
+    """
+    resume_from = last_event_id or since
+    try:
+        resume_from = int(resume_from) if resume_from else None
+    except ValueError:
+        resume_from = None
+
+    sub, backlog = bus.subscribe(resume_from)
+
+    async def event_stream():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield _format_sse(event)
+            while not sub.closed:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield _format_sse(event)
+        finally:
+            bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/api/stock-history")
 def get_stock_history(ticker: str, period: str = "1mo"):
     """
     Get stock price history for a ticker.
+    period options: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max.
+    Served from the local price store, which reaches upstream at most once a day per ticker.
     """
-    import yfinance as yf
-    import pandas as pd
-    
-    logger.info(f"Fetching stock history for {ticker} over {period}")
-    
+    from price_store import prices, format_history
+
+    ticker = ticker.upper()
     try:
-        ticker = ticker.upper()
-        stock = yf.Ticker(ticker)
-        # Fetch history
-        # period options: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
-        hist = stock.history(period=period)
-        
-        if hist.empty:
-            logger.warning(f"No stock history found for {ticker}")
-            return {"ticker": ticker, "history": []}
-            
-        # Reset index to get Date as a column
-        hist = hist.reset_index()
-        
-        # Format for frontend: { date: "YYYY-MM-DD", price: float }
-        data = []
-        for index, row in hist.iterrows():
-            # Date might be Timestamp
-            date_str = row['Date'].strftime('%Y-%m-%d')
-            # Use Close price
-            price = round(row['Close'], 2)
-            data.append({"date": date_str, "price": price})
-            
-        return {"ticker": ticker, "history": data}
-        
+        dates, closes = prices.history(ticker, period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Failed to fetch stock history: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Failed to fetch stock history for {ticker}: {e}")
+        raise HTTPException(status_code=502, detail=f"Price history unavailable: {e}")
+
+    if not len(dates):
+        logger.warning(f"No stock history found for {ticker}")
+    # Format for frontend: { date: "YYYY-MM-DD", price: float }
+    return {"ticker": ticker, "history": format_history(dates, closes)}
@@ -0,0 +1,230 @@
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Prefix for every exported metric
+NAMESPACE = "sec_insight"
+
+# Latency buckets in seconds: sub-millisecond cache hits up to multi-minute analyses
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Add a Server-Timing header with the spans recorded while serving each request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> list:
+        """
+        [(suffix, labels, value)] for the text exposition.
+        """
+        with self._lock:
+            return [("", dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> list:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                labels = dict(zip(self.labels, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(("_bucket", dict(labels, le=_format_value(bound)), cumulative))
+                samples.append(("_sum", labels, total))
+                samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Metrics owned by this process plus collectors: functions called at scrape
+    time that turn an existing stats() dict into samples, so counters the
+    modules already keep aren't counted twice.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collector(self, fn):
+        """
+        fn() returns metrics (e.g. fresh Gauges/Counters filled from stats()).
+        Usable as a decorator.
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (0.0.4).
+        """
+        metrics = list(self._metrics)
+        for collect in self._collectors:
+            metrics.extend(collect())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served at /metrics
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "stage_duration_seconds", "Time spent per stage: EDGAR fetches, parsing, prompt assembly, model calls.",
+    labels=("stage",))
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency up to the response headers.",
+    labels=("method", "route", "status"))
+
+# Spans recorded while serving the current request, for Server-Timing. None outside a request.
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Time a stage: `with span("submissions"): ...`. Always feeds the stage
+    histogram; inside a request it is also reported in Server-Timing.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def traced(stage: str):
+    """
+    Decorator form of span().
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_request() -> list:
+    """
+    Start collecting spans for the current request. Handlers run in a copy of
+    the caller's context, so they append to the list returned here.
+    """
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+
+def request_spans() -> list:
+    """
+    Spans recorded so far for the current request (empty outside one).
+    """
+    return list(_request_spans.get() or [])
+
+
+def stage_totals(spans: list) -> dict:
+    """
+    { stage: seconds } with repeated stages summed, in first-seen order.
+    """
+    totals = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return totals
+
+
+def server_timing(spans: list, total: float) -> str:
+    """
+    Server-Timing header value.
+    """
+    entries = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in stage_totals(spans).items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
@@ -1,54 +1,291 @@
+import asyncio
 import logging
+import os
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from scraper import get_recent_filings
+from scraper import get_recent_filings, get_cik, get_latest_filings_feed, get_daily_index, submissions_cache, FEED_PAGE_SIZE
+from edgar_client import edgar
+from monitor_store import MonitorStore
+from feed_bus import bus
+from feed_index import feed_index
+from filing_store import filing_store, filing_row
+from metrics import registry
 # from analyzer import analyze_filing # import when ready to integrate fully
 
 logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
+# "feed": read EDGAR's latest-filings feed once per tick and only hit submissions for matching CIKs
+# "ticker": legacy mode, fetch submissions for every tracked ticker on every tick
+MONITOR_MODE = os.getenv("MONITOR_MODE", "feed")
+POLL_SECONDS = int(os.getenv("MONITOR_POLL_SECONDS", 30 if MONITOR_MODE == "feed" else 600))
+
+# How far back to page through the feed when a lot was filed since the last tick
+FEED_MAX_PAGES = 10
+
+# After longer downtime than this, catch up by checking every ticker instead of the daily indexes
+CATCH_UP_MAX_DAYS = 14
+
+tick_seconds = registry.histogram("monitor_tick_duration_seconds", "Duration of a monitor tick.", labels=("kind", "ok"))
+
 # In-memory store for latest accession numbers to detect new filings
 # Structure: { "AAPL": "0000320193-23-000123" }
 latest_accessions = {}
 tracked_tickers = set()
+# Reverse map used to match feed entries. Structure: { "0000320193": "AAPL" }
+tracked_ciks = {}
 
-async def check_updates():
+# Durable copy of the above, see load_state()
+store = None
+# High-water mark restored at startup; the first tick catches up from it
+_catch_up_since = None
+
+# Feed entries already processed, as "accession:cik" (Form 4s list issuer and owner separately)
+SEEN_LIMIT = FEED_PAGE_SIZE * FEED_MAX_PAGES * 2
+_seen_order = deque()
+_seen_entries = set()
+
+def _remember(key: str):
+    if key in _seen_entries:
+        return
+    if len(_seen_order) >= SEEN_LIMIT:
+        _seen_entries.discard(_seen_order.popleft())
+    _seen_order.append(key)
+    _seen_entries.add(key)
+
+def _feed_time(entry: dict) -> float:
+    try:
+        return datetime.fromisoformat(entry['updated']).timestamp()
+    except (KeyError, ValueError):
+        return 0.0
+
+def poll_feed(since: float = None):
     """
-    Background task to check for new filings.
+    Return (entries, complete): feed entries that weren't seen on a previous tick.
+    Pages back until it reaches already-seen entries (only one page on the first tick),
+    or, when `since` is given, until it reaches entries older than that timestamp.
+    complete is False when FEED_MAX_PAGES ran out first, so entries may be missing.
     """
-    logger.info("Checking for SEC updates...")
-    for ticker in tracked_tickers:
+    first_tick = not _seen_entries and since is None
+    new_entries = []
+    complete = False
+    for page in range(FEED_MAX_PAGES):
+        batch = get_latest_filings_feed(start=page * FEED_PAGE_SIZE)
+        fresh = [e for e in batch if f"{e['accessionNumber']}:{e['cik']}" not in _seen_entries]
+        new_entries.extend(fresh)
+        if first_tick or len(batch) < FEED_PAGE_SIZE:
+            complete = True
+            break
+        if since is not None:
+            if _feed_time(batch[-1]) < since:
+                complete = True
+                break
+        elif len(fresh) < len(batch):
+            complete = True
+            break
+    else:
+        logger.warning(f"Feed had more than {FEED_MAX_PAGES} pages of new entries, some may be missed")
+
+    for e in new_entries:
+        _remember(f"{e['accessionNumber']}:{e['cik']}")
+    return new_entries, complete
+
+def record_filings(filings: list):
+    """
+    Add filings to the materialized feed (and buffer them for the store).
+    """
+    added = [f for f in filings if feed_index.add(f)]
+    if added and store:
+        store.add_feed_items(added)
+
+def check_ticker(ticker: str, limit: int = 10) -> list:
+    """
+    Compare the ticker's submissions against the last seen accession.
+    Returns the filings that are new since then (newest first).
+    """
+    filings = get_recent_filings(ticker, limit=limit)
+    if not filings:
+        return []
+
+    last_known = latest_accessions.get(ticker)
+    new_filings = []
+    if last_known:
+        for f in filings:
+            if f['accessionNumber'] == last_known:
+                break
+            new_filings.append(f)
+
+    # Publish oldest first so stream clients see them in filing order
+    for f in reversed(new_filings):
+        logger.info(f"NEW FILING DETECTED FOR {ticker}: {f['form']}")
+        bus.publish("filing", f)
+    record_filings(new_filings)
+
+    # Update latest
+    latest = filings[0]
+    if latest['accessionNumber'] != last_known:
+        latest_accessions[ticker] = latest['accessionNumber']
+        if store:
+            store.set_last_seen(latest['cik'], ticker, latest['accessionNumber'])
+    return new_filings
+
+def _check_all_tickers(limit: int = 10) -> bool:
+    for ticker in list(tracked_tickers):
         try:
-            filings = get_recent_filings(ticker)
-            if not filings:
-                continue
-            
-            most_recent = filings[0]
-            last_known = latest_accessions.get(ticker)
-            
-            if last_known and most_recent['accessionNumber'] != last_known:
-                logger.info(f"NEW FILING DETECTED FOR {ticker}: {most_recent['form']}")
-                # Here we would trigger analysis and notification
-                # await notify_new_filing(ticker, most_recent)
-            
-            # Update latest
-            latest_accessions[ticker] = most_recent['accessionNumber']
-            
+            check_ticker(ticker, limit=limit)
         except Exception as e:
             logger.error(f"Error monitoring {ticker}: {e}")
+    return True
+
+def _check_ciks(ciks, limit: int = 10):
+    for cik in ciks:
+        ticker = tracked_ciks[cik]
+        try:
+            # Make sure the submissions cache revalidates instead of serving a fresh-looking copy
+            submissions_cache.expire(cik)
+            check_ticker(ticker, limit=limit)
+        except Exception as e:
+            logger.error(f"Error monitoring {ticker}: {e}")
+
+def _check_feed() -> bool:
+    try:
+        entries, complete = poll_feed()
+    except Exception as e:
+        logger.error(f"Error polling EDGAR feed: {e}")
+        return False
+    if not complete:
+        logger.warning("Feed backlog exceeded the page limit, checking every ticker")
+        return _check_all_tickers(limit=100)
+
+    hit_ciks = {e['cik'] for e in entries if e['cik'] in tracked_ciks}
+    logger.info(f"Feed tick: {len(entries)} new entries, {len(hit_ciks)} tracked CIKs hit")
+    _check_ciks(hit_ciks)
+    return True
+
+def _store_index_entries(entries: list):
+    """
+    Every company's filings from a daily index go into the filing store, so
+    market-wide questions ("Form 4s on day D") are answered locally.
+    """
+    try:
+        filing_store.upsert([filing_row(e['cik'], e['accessionNumber'], e['form'], e['filingDate']) for e in entries])
+    except Exception as e:
+        logger.error(f"Error storing daily index entries: {e}")
+
+def _catch_up(since: float) -> bool:
+    """
+    Detect everything filed since the stored high-water mark: daily indexes for the
+    days in between, plus the live feed for whatever isn't in a daily index yet.
+    """
+    days = (date.today() - date.fromtimestamp(since)).days
+    if MONITOR_MODE != "feed" or days > CATCH_UP_MAX_DAYS:
+        logger.info(f"Catching up on {len(tracked_tickers)} tickers individually")
+        return _check_all_tickers(limit=100)
+
+    candidates = set()
+    try:
+        for offset in range(days + 1):
+            entries = get_daily_index(date.fromtimestamp(since) + timedelta(days=offset))
+            candidates.update(e['cik'] for e in entries or [] if e['cik'] in tracked_ciks)
+            _store_index_entries(entries or [])
+        # Today isn't in a daily index yet: the feed is the only source for it
+        entries, complete = poll_feed(since=since)
+        candidates.update(e['cik'] for e in entries if e['cik'] in tracked_ciks)
+    except Exception as e:
+        logger.error(f"Catch-up via EDGAR indexes failed, checking every ticker: {e}")
+        return _check_all_tickers(limit=100)
+    if not complete:
+        logger.warning(f"Feed doesn't reach back to {datetime.fromtimestamp(since)}, checking every ticker")
+        return _check_all_tickers(limit=100)
+
+    logger.info(f"Catching up since {datetime.fromtimestamp(since)}: {len(candidates)} tracked CIKs had filings")
+    _check_ciks(candidates, limit=100)
+    return True
+
+def _tick():
+    global _catch_up_since
+    started = time.time()
+    if _catch_up_since is not None:
+        kind = "catch_up"
+        ok = _catch_up(_catch_up_since)
+        _catch_up_since = None
+    elif MONITOR_MODE == "feed":
+        kind = "feed"
+        ok = _check_feed()
+    else:
+        kind = "ticker"
+        ok = _check_all_tickers()
+    tick_seconds.observe(time.time() - started, kind=kind, ok=str(ok).lower())
+    if store:
+        # Only advance the high-water mark when the tick actually looked at EDGAR
+        store.flush(high_water_mark=started if ok else None)
+
+async def check_updates():
+    """
+    Background task to check for new filings.
+    The HTTP work runs in a worker thread so it doesn't block the event loop.
+    """
+    logger.info("Checking for SEC updates...")
+    await asyncio.to_thread(_tick)
+
+    logger.info(f"EDGAR client stats: {edgar.stats()}")
+
+def load_state(path: str = None):
+    """
+    Restore the watchlist and last-seen accessions from the monitor store.
+    Returns the stored high-water mark (unix time) or None on a fresh install.
+    """
+    global store, _catch_up_since
+    store = MonitorStore(path) if path else MonitorStore()
+    tracked, last_seen, high_water_mark = store.load()
+    _catch_up_since = high_water_mark
+    for ticker, cik in tracked.items():
+        tracked_tickers.add(ticker)
+        if cik:
+            tracked_ciks[cik] = ticker
+    latest_accessions.update(last_seen)
+    feed_index.add_many(store.load_feed_items())
+    logger.info(f"Restored {len(tracked)} tracked tickers and {len(feed_index)} feed items from {store.path}")
+    return high_water_mark
 
 def start_monitor():
-    scheduler.add_job(check_updates, 'interval', minutes=10) # 10 mins for safe polling
+    load_state()
+    # First tick runs right away so filings that landed while we were down are caught up on.
+    # max_instances=1 so a slow tick is skipped rather than stacked
+    scheduler.add_job(check_updates, 'interval', seconds=POLL_SECONDS, max_instances=1, coalesce=True,
+                      next_run_time=datetime.now())
     scheduler.start()
-    logger.info("Background monitor started.")
+    logger.info(f"Background monitor started ({MONITOR_MODE} mode, every {POLL_SECONDS}s).")
+
+def stop_monitor():
+    scheduler.shutdown(wait=False)
+    if store:
+        store.close()
+    logger.info("Background monitor stopped.")
 
 def add_ticker_to_monitor(ticker: str):
-    tracked_tickers.add(ticker)
+    if ticker not in tracked_tickers:
+        tracked_tickers.add(ticker)
+        cik = get_cik(ticker)
+        if cik:
+            tracked_ciks[cik] = ticker
+        if store:
+            store.add_ticker(ticker, cik)
+    # Already have a baseline (e.g. restored from the store), don't re-baseline
+    if ticker in latest_accessions:
+        return
     # Perform initial fetch to set baseline
     try:
         filings = get_recent_filings(ticker)
         if filings:
             latest_accessions[ticker] = filings[0]['accessionNumber']
+            record_filings(filings)
+            if store:
+                store.set_last_seen(filings[0]['cik'], ticker, filings[0]['accessionNumber'])
+                store.flush()
             logger.info(f"Started tracking {ticker}. Latest: {filings[0]['accessionNumber']}")
     except Exception as e:
         logger.error(f"Failed to init tracking for {ticker}: {e}")
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rows kept in feed_items, matches the in-memory feed index budget
+FEED_ITEMS_LIMIT = 5000
+
+DB_PATH = os.getenv("MONITOR_DB_PATH", os.path.join(os.path.dirname(__file__), "data", "monitor.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked_tickers (
+    ticker TEXT PRIMARY KEY,
+    cik TEXT,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS last_seen (
+    cik TEXT PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feed_items (
+    accession TEXT PRIMARY KEY,
+    filing_date TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feed_items_date ON feed_items (filing_date, accession);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class MonitorStore:
+    """
+    Durable watchlist and last-seen accession per CIK, in SQLite (WAL mode).
+    Last-seen updates are buffered in memory and written in one transaction
+    per monitor tick via flush().
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The monitor tick runs in a worker thread, API handlers in the threadpool
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_feed = {}
+
+    def load(self):
+        """
+        Returns (tracked, last_seen, high_water_mark):
+        tracked: { ticker: cik }, last_seen: { ticker: accession }, high_water_mark: unix time or None
+        """
+        with self._lock:
+            tracked = dict(self._conn.execute("SELECT ticker, cik FROM tracked_tickers"))
+            last_seen = dict(self._conn.execute("SELECT ticker, accession FROM last_seen"))
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'high_water_mark'").fetchone()
+        return tracked, last_seen, float(row[0]) if row else None
+
+    def add_ticker(self, ticker: str, cik: str):
+        # User-initiated and rare, so written straight away
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tracked_tickers (ticker, cik, added_at) VALUES (?, ?, ?)",
+                (ticker, cik, time.time()),
+            )
+            self._conn.commit()
+
+    def set_last_seen(self, cik: str, ticker: str, accession: str):
+        """
+        Buffer a last-seen update until the next flush().
+        """
+        with self._lock:
+            self._pending[cik] = (cik, ticker, accession, time.time())
+
+    def add_feed_items(self, filings: list):
+        """
+        Buffer filings for the materialized feed until the next flush().
+        """
+        with self._lock:
+            for f in filings:
+                self._pending_feed[f['accessionNumber']] = (f['accessionNumber'], f['filingDate'], json.dumps(f))
+
+    def load_feed_items(self, limit: int = FEED_ITEMS_LIMIT) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM feed_items ORDER BY filing_date DESC, accession DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def flush(self, high_water_mark: float = None):
+        """
+        Write buffered updates (and the tick's high-water mark) in one transaction.
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            pending_feed = list(self._pending_feed.values())
+            self._pending_feed.clear()
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO last_seen (cik, ticker, accession, updated_at) VALUES (?, ?, ?, ?)",
+                        pending,
+                    )
+                    if pending_feed:
+                        self._conn.executemany(
+                            "INSERT OR IGNORE INTO feed_items (accession, filing_date, data) VALUES (?, ?, ?)",
+                            pending_feed,
+                        )
+                        # Keep the table bounded like the in-memory index
+                        self._conn.execute(
+                            "DELETE FROM feed_items WHERE accession NOT IN "
+                            "(SELECT accession FROM feed_items ORDER BY filing_date DESC, accession DESC LIMIT ?)",
+                            (FEED_ITEMS_LIMIT,),
+                        )
+                    if high_water_mark is not None:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO meta (key, value) VALUES ('high_water_mark', ?)",
+                            (str(high_water_mark),),
+                        )
+            except Exception as e:
+                # Keep the updates around for the next tick
+                for row in pending:
+                    self._pending.setdefault(row[0], row)
+                for row in pending_feed:
+                    self._pending_feed.setdefault(row[0], row)
+                logger.error(f"Failed to persist monitor state: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
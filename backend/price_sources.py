@@ -0,0 +1,64 @@
+import datetime
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Selected with PRICE_SOURCE: "yahoo" (default) or "fake", the offline stand-in
+# for load tests and benchmarks. Read when the source is created.
+DEFAULT_SOURCE = "yahoo"
+
+# Fake source: a seeded random walk per ticker, starting here
+FAKE_START = datetime.date(2000, 1, 3)
+
+
+class YahooSource:
+    """
+    Daily closes from Yahoo Finance via yfinance. Every source exposes
+    fetch(ticker, start) -> (dates, closes): numpy datetime64[D] and float64
+    arrays, oldest first, from `start` (a date, or None for all history) to today.
+    """
+    name = "yahoo"
+
+    def fetch(self, ticker: str, start: datetime.date = None):
+        import yfinance as yf
+        stock = yf.Ticker(ticker)
+        hist = stock.history(start=start.isoformat()) if start else stock.history(period="max")
+        if hist.empty:
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype="float64")
+        # The index is exchange-local midnight; the calendar date is what we keep
+        dates = hist.index.tz_localize(None).to_numpy().astype("datetime64[D]")
+        return dates, hist["Close"].to_numpy(dtype="float64")
+
+
+class FakeSource:
+    """
+    Offline stand-in: deterministic weekday closes per ticker, no network.
+    """
+    name = "fake"
+
+    def fetch(self, ticker: str, start: datetime.date = None):
+        days = np.arange(np.datetime64(FAKE_START), np.datetime64(datetime.date.today()) + 1)
+        days = days[np.is_busday(days)]
+        seed = int.from_bytes(ticker.encode("utf-8")[:8].ljust(8, b"\0"), "little")
+        steps = np.random.default_rng(seed).normal(0.0003, 0.015, len(days))
+        closes = 50 * np.exp(np.cumsum(steps))
+        if start:
+            keep = days >= np.datetime64(start)
+            days, closes = days[keep], closes[keep]
+        return days, closes
+
+
+def create_source():
+    """
+    The price source selected by PRICE_SOURCE.
+    """
+    name = os.getenv("PRICE_SOURCE", DEFAULT_SOURCE)
+    if name == "fake":
+        logger.info("Using the fake price source (PRICE_SOURCE=fake)")
+        return FakeSource()
+    if name != "yahoo":
+        logger.error(f"Unknown PRICE_SOURCE {name!r}, expected 'yahoo' or 'fake'; using yahoo")
+    return YahooSource()
@@ -0,0 +1,238 @@
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cache_store import CACHE_DIR
+from metrics import span
+from price_sources import create_source
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# One memory-mapped .npy of (date, close) bars per ticker, plus a small JSON of metadata
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join(CACHE_DIR, "prices"))
+BARS_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", "float64")])
+
+# History fetched the first time a ticker is seen, so switching between the
+# dashboard's periods is served locally; longer periods extend it on demand
+INITIAL_PERIOD = "5y"
+# Bars re-fetched before the last stored one on an incremental refresh. If they
+# changed, the history was re-adjusted (split, dividend) and is fetched whole again.
+OVERLAP_DAYS = 10
+# Tickers whose arrays stay mapped
+MAX_ENTRIES = 1000
+
+# yfinance periods: the last N bars for the day periods, calendar months/years back from today otherwise
+PERIODS = {"1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"}
+BAR_PERIODS = {"1d": 1, "5d": 5}
+TICKER_RE = re.compile(r"^[A-Z0-9.\-^=]{1,15}$")
+
+
+def _months_ago(day: datetime.date, months: int) -> datetime.date:
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    month += 1
+    # Clamp the 31st to the end of shorter months
+    for d in (day.day, 30, 29, 28):
+        try:
+            return datetime.date(year, month, d)
+        except ValueError:
+            continue
+
+
+def period_start(period: str, today: datetime.date):
+    """
+    First calendar date a period covers, or None for "max" and the trading-day periods.
+    """
+    if period == "max" or period in BAR_PERIODS:
+        return None
+    if period == "ytd":
+        return datetime.date(today.year, 1, 1)
+    if period.endswith("mo"):
+        return _months_ago(today, int(period[:-2]))
+    return _months_ago(today, 12 * int(period[:-1]))
+
+
+def _covers(meta: dict, start: datetime.date) -> bool:
+    """
+    Whether stored history reaches back to start (None meaning all of it).
+    """
+    covers_from = meta.get("covers_from")
+    return covers_from is None or (start is not None and start >= datetime.date.fromisoformat(covers_from))
+
+
+def format_history(dates: np.ndarray, closes: np.ndarray) -> list:
+    """
+    [{ 'date': 'YYYY-MM-DD', 'price': float }] for the frontend, converted column-wise.
+    """
+    date_strings = np.datetime_as_string(dates, unit="D").tolist()
+    prices = np.round(closes, 2).tolist()
+    return [{"date": d, "price": p} for d, p in zip(date_strings, prices)]
+
+
+class PriceStore:
+    """
+    Local daily price history per ticker. The first request fetches
+    INITIAL_PERIOD (or longer, if asked for); after that a ticker is refreshed
+    at most once a day, fetching only the bars since the last stored one, and
+    every period is served by slicing the stored arrays.
+
+    source is one of price_sources (Yahoo Finance or the offline fake).
+    """
+
+    def __init__(self, source=None, path: str = PRICE_STORE_DIR, max_entries: int = MAX_ENTRIES):
+        self.source = source or create_source()
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("prices")
+        self._stats = {"local": 0, "appended": 0, "full_fetches": 0, "stale": 0, "errors": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, tickers=len(self._entries), source=self.source.name)
+
+    def _files(self, ticker: str):
+        base = os.path.join(self.path, ticker)
+        return base + ".npy", base + ".json"
+
+    def _load(self, ticker: str):
+        """
+        (bars, meta) from memory or disk, or None if the ticker was never fetched.
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None:
+                self._entries.move_to_end(ticker)
+                return entry
+        bars_path, meta_path = self._files(ticker)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            bars = np.load(bars_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return self._remember(ticker, bars, meta)
+
+    def _remember(self, ticker: str, bars: np.ndarray, meta: dict):
+        with self._lock:
+            self._entries[ticker] = (bars, meta)
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return bars, meta
+
+    def _save(self, ticker: str, bars: np.ndarray, meta: dict):
+        os.makedirs(self.path, exist_ok=True)
+        bars_path, meta_path = self._files(ticker)
+        # Replace, don't rewrite in place: readers may still have the old file mapped.
+        # Bars first, so a crash in between only costs an extra refresh.
+        tmp_path = f"{bars_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp_path, bars_path)
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        return self._remember(ticker, np.load(bars_path, mmap_mode="r"), meta)
+
+    def _fetch(self, ticker: str, start: datetime.date) -> np.ndarray:
+        with span("price_fetch"):
+            dates, closes = self.source.fetch(ticker, start)
+        bars = np.empty(len(dates), dtype=BARS_DTYPE)
+        bars["date"] = dates
+        bars["close"] = closes
+        return bars
+
+    def _full_fetch(self, ticker: str, start: datetime.date, today: datetime.date):
+        self._count("full_fetches")
+        bars = self._fetch(ticker, start)
+        meta = {"fetched_on": today.isoformat(), "covers_from": start.isoformat() if start else None}
+        return self._save(ticker, bars, meta)
+
+    def _append(self, ticker: str, bars: np.ndarray, meta: dict, today: datetime.date):
+        """
+        Fetch the bars since the last stored one (plus an overlap to detect re-adjusted history).
+        """
+        last = bars["date"][-1]
+        fresh = self._fetch(ticker, (last - np.timedelta64(OVERLAP_DAYS, "D")).astype(datetime.date))
+        if len(fresh):
+            # The last stored bar may have been a partial day, so it isn't part of the check
+            overlap = np.intersect1d(bars["date"][bars["date"] < last], fresh["date"], assume_unique=True)
+            stored = bars["close"][np.searchsorted(bars["date"], overlap)]
+            fetched = fresh["close"][np.searchsorted(fresh["date"], overlap)]
+            if not np.allclose(stored, fetched, rtol=1e-6):
+                logger.info(f"Price history for {ticker} was re-adjusted, refetching it")
+                covers_from = meta.get("covers_from")
+                return self._full_fetch(ticker, datetime.date.fromisoformat(covers_from) if covers_from else None, today)
+            bars = np.concatenate([bars[bars["date"] < fresh["date"][0]], fresh])
+        self._count("appended")
+        return self._save(ticker, bars, dict(meta, fetched_on=today.isoformat()))
+
+    def _refresh(self, ticker: str, start: datetime.date, today: datetime.date):
+        entry = self._load(ticker)
+        if entry is None:
+            return self._full_fetch(ticker, start, today)
+        bars, meta = entry
+        if not _covers(meta, start):
+            return self._full_fetch(ticker, start, today)
+        if meta.get("fetched_on") == today.isoformat():
+            return entry
+        if not len(bars):
+            return self._full_fetch(ticker, start, today)
+        return self._append(ticker, bars, meta, today)
+
+    def history(self, ticker: str, period: str = "1mo"):
+        """
+        (dates, closes) for a period, oldest first. Reaches upstream at most once
+        a day per ticker; if that fails, stored history is served instead.
+        Raises ValueError for a bad ticker or period, and upstream errors when
+        there is nothing stored to fall back on.
+        """
+        ticker = ticker.upper()
+        if not TICKER_RE.match(ticker):
+            raise ValueError(f"Invalid ticker: {ticker}")
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(sorted(PERIODS))}")
+
+        today = datetime.date.today()
+        start = period_start(period, today)
+        initial = period_start(INITIAL_PERIOD, today)
+        wanted = None if period == "max" else min(start or initial, initial)
+
+        entry = self._load(ticker)
+        if entry is not None and entry[1].get("fetched_on") == today.isoformat() and _covers(entry[1], wanted):
+            self._count("local")
+        else:
+            try:
+                entry = self._flight.do(f"{ticker}:{wanted}", lambda: self._refresh(ticker, wanted, today))
+            except Exception as e:
+                self._count("errors")
+                if entry is None:
+                    raise
+                self._count("stale")
+                logger.warning(f"Refreshing prices for {ticker} failed, serving stored history: {e}")
+
+        bars = entry[0]
+        if period in BAR_PERIODS:
+            selected = bars[-BAR_PERIODS[period]:]
+        elif start:
+            selected = bars[np.searchsorted(bars["date"], np.datetime64(start)):]
+        else:
+            selected = bars
+        return selected["date"], selected["close"]
+
+
+# Process-wide store behind /api/stock-history
+prices = PriceStore()
@@ -1,41 +1,135 @@
 import requests
-from bs4 import BeautifulSoup
 import logging
+import re
+import xml.etree.ElementTree as ET
+
+from edgar_client import edgar
+from edgar_index import parse_master_index
+from filing_store import filing_store, filing_row
+from metrics import span
+from submissions_cache import SubmissionsCache
+from ticker_index import TickerIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# SEC EDGAR requires a User-Agent in the format: "Sample Company Name AdminContact@<sample company domain>.com"
-# or "Individual Name AdminContact@<email>.com"
-HEADERS = {
-    "User-Agent": "Individual Investor gemini_hackathon@example.com",
-    # "Accept-Encoding": "gzip, deflate",
-    # "Host": "www.sec.gov"
-}
+def _fetch_company_tickers() -> dict:
+    url = "https://www.sec.gov/files/company_tickers.json"
+    response = edgar.get(url)
+    return response.json()
+
+# Process-wide ticker/CIK index, loaded once and refreshed in the background
+ticker_index = TickerIndex(fetch=_fetch_company_tickers)
+
+def _fetch_submissions(url: str, headers: dict):
+    return edgar.get(url, headers=headers)
+
+# Parsed submissions per CIK, revalidated with conditional GETs
+submissions_cache = SubmissionsCache(fetch=_fetch_submissions)
 
 def get_cik(ticker: str) -> str:
     """
     Fetch the CIK (Central Index Key) for a given ticker symbol.
-    Uses the SEC's company tickers JSON.
+    Uses the SEC's company tickers JSON, via the in-memory ticker index.
     """
     try:
-        url = "https://www.sec.gov/files/company_tickers.json"
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        data = response.json()
-        
-        ticker = ticker.upper()
-        for idx, entry in data.items():
-            if entry['ticker'] == ticker:
-                # CIK must be 10 digits, padded with leading zeros
-                return str(entry['cik_str']).zfill(10)
-        logger.error(f"Ticker {ticker} not found.")
-        return None
+        with span("cik_lookup"):
+            cik = ticker_index.get_cik(ticker)
+        if not cik:
+            logger.error(f"Ticker {ticker.upper()} not found.")
+        return cik
     except Exception as e:
         logger.error(f"Error fetching CIK for {ticker}: {e}")
         return None
 
+def get_ticker_for_cik(cik) -> str:
+    """
+    Reverse lookup: CIK -> primary ticker symbol (or None).
+    """
+    return ticker_index.get_ticker(cik)
+
+def filing_url(cik, accession_number: str, primary_document: str) -> str:
+    """
+    URL of a filing's primary document, or of its index page when the primary
+    document isn't known (filings only seen in a master index).
+    """
+    # URL format: https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{primaryDocument}
+    # Accession number in URL usually has dashes removed
+    accession_no_dash = accession_number.replace("-", "")
+    if not primary_document:
+        primary_document = f"{accession_number}-index.htm"
+    return f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession_no_dash}/{primary_document}"
+
+def _store_submissions(cik: str, submissions):
+    """
+    Write a downloaded submissions document into the filing store, once per download
+    (a 304 hands back the same entry, already stored).
+    """
+    if submissions.stored:
+        return
+    columns = submissions.columns
+    rows = [filing_row(cik, accession, form, filing_date, report_date, primary_document)
+            for accession, form, filing_date, report_date, primary_document in zip(
+                columns["accessionNumber"], columns["form"], columns["filingDate"],
+                columns["reportDate"], columns["primaryDocument"])]
+    with span("filing_store"):
+        filing_store.upsert(rows)
+    submissions.stored = True
+
+def _get_submissions(cik: str):
+    with span("submissions"):
+        submissions = submissions_cache.get(cik)
+    try:
+        _store_submissions(cik, submissions)
+    except Exception as e:
+        logger.error(f"Error storing filings for CIK {cik}: {e}")
+    return submissions
+
+def sync_filings(cik: str) -> bool:
+    """
+    Bring the filing store up to date with a company's submissions (usually a
+    cheap revalidation). Returns False if EDGAR couldn't be reached, in which
+    case the store serves what it already has.
+    """
+    try:
+        _get_submissions(cik)
+        return True
+    except Exception as e:
+        logger.error(f"Error syncing filings for CIK {cik}: {e}")
+        return False
+
+def stored_filings(cik: str = None, forms=None, since: str = None, until: str = None, limit: int = 20,
+                   cursor: str = None):
+    """
+    One page of filings from the local filing store, newest first, shaped like
+    get_recent_filings() results. Doesn't touch EDGAR: call sync_filings() first.
+    Returns (filings, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    with span("filing_store"):
+        items, next_cursor = filing_store.query(ciks=[cik] if cik else None, forms=forms, since=since,
+                                                until=until, limit=limit, cursor=cursor)
+    return [_stored_filing(f) for f in items], next_cursor
+
+def latest_stored_filing(cik: str, form: str):
+    """
+    The company's most recent filing of a form from the filing store, or None.
+    """
+    with span("filing_store"):
+        filing = filing_store.latest(cik, form)
+    return _stored_filing(filing) if filing else None
+
+def _stored_filing(f: dict) -> dict:
+    return {
+        "ticker": get_ticker_for_cik(f["cik"]),
+        "cik": f["cik"],
+        "form": f["form"],
+        "accessionNumber": f["accessionNumber"],
+        "filingDate": f["filingDate"],
+        "reportDate": f["reportDate"] or "",
+        "url": filing_url(f["cik"], f["accessionNumber"], f["primaryDocument"]),
+    }
+
 def get_recent_filings(ticker: str, filing_type: str = "", limit: int = 10):
     """
     Fetch recent filings for a ticker.
@@ -45,105 +139,260 @@ def get_recent_filings(ticker: str, filing_type: str = "", limit: int = 10):
     if not cik:
         return []
 
-    # SEC Submissions API
-    url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-    
     try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        data = response.json()
-        
-        filings = data.get("filings", {}).get("recent", {})
-        if not filings:
+        # SEC Submissions API, revalidated with ETag/Last-Modified
+        submissions = _get_submissions(cik)
+        if not len(submissions):
             return []
-            
+
+        filings = submissions.columns
+        # Only walk the rows of the requested form type
+        rows = submissions.rows_for_form(filing_type) if filing_type else range(len(submissions))
+
         # Parse into a list of dicts
         results = []
-        count = len(filings["accessionNumber"])
-        
-        for i in range(count):
-            form = filings["form"][i]
-            if filing_type and form != filing_type:
-                continue
-                
+        for i in rows:
             accession_number = filings["accessionNumber"][i]
             primary_document = filings["primaryDocument"][i]
             filing_date = filings["filingDate"][i]
             report_date = filings["reportDate"][i]
-            
+
             # Construct the full URL to the document
-            # URL format: https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{primaryDocument}
-            # Accession number in URL usually has dashes removed
-            accession_no_dash = accession_number.replace("-", "")
-            doc_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession_no_dash}/{primary_document}"
-            
+            doc_url = filing_url(cik, accession_number, primary_document)
+
             results.append({
                 "ticker": ticker,
                 "cik": cik,
-                "form": form,
+                "form": filings["form"][i],
                 "accessionNumber": accession_number,
                 "filingDate": filing_date,
                 "reportDate": report_date,
                 "url": doc_url
             })
-            
+
             if len(results) >= limit:
                 break
-                
+
         return results
-        
+
     except Exception as e:
         logger.error(f"Error fetching filings for {ticker}: {e}")
         return []
 
-import hashlib
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+FEED_PAGE_SIZE = 100
+
+def get_latest_filings_feed(start: int = 0, count: int = FEED_PAGE_SIZE) -> list:
+    """
+    Fetch one page of EDGAR's "latest filings" Atom feed (newest first).
+    Returns a list of dicts { 'cik', 'form', 'accessionNumber', 'company', 'updated', 'url' }.
+    Form 4s etc. appear once per filer (issuer and reporting owner) with the same accession.
+    Raises on network/parse errors.
+    """
+    url = (
+        "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent"
+        f"&type=&company=&dateb=&owner=include&start={start}&count={count}&output=atom"
+    )
+    with span("feed_poll"):
+        response = edgar.get(url)
+        root = ET.fromstring(response.content)
+
+    entries = []
+    for entry in root.findall("atom:entry", ATOM_NS):
+        # Title looks like: "8-K - Apple Inc. (0000320193) (Filer)"
+        title = entry.findtext("atom:title", default="", namespaces=ATOM_NS)
+        cik_match = re.search(r"\((\d{10})\)", title)
+        # Id looks like: "urn:tag:sec.gov,2008:accession-number=0000320193-25-000008"
+        entry_id = entry.findtext("atom:id", default="", namespaces=ATOM_NS)
+        accession_match = re.search(r"accession-number=(\S+)", entry_id)
+        if not cik_match or not accession_match:
+            continue
+
+        category = entry.find("atom:category", ATOM_NS)
+        link = entry.find("atom:link", ATOM_NS)
+        entries.append({
+            "cik": cik_match.group(1),
+            "form": category.get("term") if category is not None else title.split(" - ")[0],
+            "accessionNumber": accession_match.group(1),
+            "company": title.split(" - ", 1)[-1].rsplit(" (", 2)[0],
+            "updated": entry.findtext("atom:updated", default="", namespaces=ATOM_NS),
+            "url": link.get("href") if link is not None else "",
+        })
+    return entries
+
+def get_daily_index(day) -> list:
+    """
+    Fetch EDGAR's daily master index for a date (datetime.date).
+    Returns a list of dicts { 'cik', 'company', 'form', 'filingDate', 'accessionNumber' },
+    or None if SEC hasn't published an index for that day (weekends, holidays, today).
+    Raises on other network errors.
+    """
+    quarter = (day.month - 1) // 3 + 1
+    url = f"https://www.sec.gov/Archives/edgar/daily-index/{day.year}/QTR{quarter}/master.{day.strftime('%Y%m%d')}.idx"
+    try:
+        with span("daily_index"):
+            response = edgar.get(url)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code in (403, 404):
+            return None
+        raise
+
+    return parse_master_index(response.text)
+
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_store import cache, make_key
+from single_flight import fetch_flight
+from text_extractor import extract_text, CHUNK_SIZE
 
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+# Bump when the text extraction changes so old cached text is ignored
+FILING_TEXT_VERSION = "stream"
+FILING_TEXT_NAMESPACE = "filing_text"
+
+# Text budgets. 10-K/10-Qs keep much more, so the section parser can reach
+# Risk Factors and MD&A deep into the document.
+MAX_CHARS = 100000
+PERIODIC_MAX_CHARS = 1500000
+
+def text_budget(form: str) -> int:
+    """
+    How many characters of text to extract for a form type.
+    """
+    return PERIODIC_MAX_CHARS if form.split("/")[0] in ("10-K", "10-Q") else MAX_CHARS
 
-def get_filing_text(url: str) -> str:
+def fetch_filing_text(url: str, max_chars: int = MAX_CHARS) -> str:
     """
     Fetch and parse the text content of a filing URL.
     Caches the result locally to avoid repeated requests.
+    Raises on network/parse errors, see get_filing_text for the forgiving variant.
     """
-    # Generate a safe filename from the URL
-    url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
-    cache_path = os.path.join(CACHE_DIR, f"{url_hash}.txt")
+    cache_key = make_key(FILING_TEXT_VERSION, max_chars, url)
 
     # Check cache first
-    if os.path.exists(cache_path):
+    cached = cache.get(FILING_TEXT_NAMESPACE, cache_key)
+    if cached is not None:
         logger.info(f"Cache hit for {url}")
-        try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Error reading cache for {url}: {e}")
-            # Fallthrough to fetch if cache read fails
+        return cached
+
+    def download():
+        # Another caller may have finished between our cache miss and now
+        cached = cache.get(FILING_TEXT_NAMESPACE, cache_key)
+        if cached is not None:
+            return cached
+
+        # Stream the body through an incremental parser: no tree is built, and we stop
+        # downloading once the text budget is reached (big inline-XBRL 10-Ks are 50MB+).
+        # Download and parsing are interleaved, so they're one span.
+        with span("filing_text"):
+            response = edgar.get(url, stream=True)
+            consumed = 0
+            try:
+                def chunks():
+                    nonlocal consumed
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        consumed += len(chunk)
+                        yield chunk
+
+                text = extract_text(chunks(), max_chars=max_chars)
+            finally:
+                response.close()
+                edgar.record_bytes(consumed)
 
-    try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'lxml') # using lxml for speed
-        
-        # Remove scripts and styles
-        for script in soup(["script", "style"]):
-            script.decompose()
-            
-        text = soup.get_text(separator="\n", strip=True)
-        text = text[:100000] # Limit to 100k chars
-        
         # Save to cache
-        try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                f.write(text)
-        except Exception as e:
-            logger.error(f"Error writing to cache for {url}: {e}")
-            
+        cache.set(FILING_TEXT_NAMESPACE, cache_key, text)
         return text
-        
+
+    # Concurrent requests for the same filing share one download
+    return fetch_flight.do(cache_key, download)
+
+def get_filing_text(url: str, max_chars: int = MAX_CHARS) -> str:
+    """
+    Fetch and parse the text content of a filing URL.
+    Returns "" on failure.
+    """
+    try:
+        return fetch_filing_text(url, max_chars)
     except Exception as e:
         logger.error(f"Error fetching text from {url}: {e}")
         return ""
+
+# Concurrency for bulk fetches. The EDGAR client's rate limiter still applies
+# across all workers, so this only bounds how many requests are in flight.
+FETCH_WORKERS = int(os.getenv("EDGAR_FETCH_WORKERS", 8))
+
+def _fetch_concurrently(fetch, urls: list, max_workers: int, name: str) -> list:
+    """
+    Run fetch(index, url) for every URL on a thread pool; returns one
+    (value, error) pair per input URL, in input order.
+    """
+    results = [None] * len(urls)
+    if not urls:
+        return results
+
+    def fetch_one(index, url):
+        try:
+            results[index] = (fetch(index, url), None)
+        except Exception as e:
+            logger.error(f"Error fetching {name} from {url}: {e}")
+            results[index] = (None, str(e))
+
+    workers = max(1, min(max_workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-fetch") as pool:
+        for index, url in enumerate(urls):
+            # Each task gets a copy of our context, so its spans are reported with the request's
+            pool.submit(contextvars.copy_context().run, fetch_one, index, url)
+
+    return results
+
+def get_filing_texts(urls: list, max_workers: int = FETCH_WORKERS, max_chars=MAX_CHARS) -> list:
+    """
+    Fetch the text of several filings concurrently.
+    max_chars is either one budget for all URLs or a list with one per URL.
+    Returns one dict per input URL, in input order:
+    { 'url': str, 'text': str, 'error': str or None }
+    """
+    budgets = max_chars if isinstance(max_chars, (list, tuple)) else [max_chars] * len(urls)
+    results = _fetch_concurrently(lambda i, url: fetch_filing_text(url, budgets[i]), urls, max_workers, "text")
+    return [{"url": url, "text": text or "", "error": error} for url, (text, error) in zip(urls, results)]
+
+import json
+
+from form4 import FORM4_VERSION, ownership_xml_url, parse_ownership_xml
+
+OWNERSHIP_NAMESPACE = "ownership"
+
+def fetch_ownership(url: str) -> dict:
+    """
+    Fetch and parse the ownership XML behind a Form 3/4/5 URL (rendered or raw).
+    Returns the parsed document, see form4.parse_ownership_xml.
+    Raises on network/parse errors.
+    """
+    xml_url = ownership_xml_url(url)
+    cache_key = make_key(FORM4_VERSION, xml_url)
+    cached = cache.get(OWNERSHIP_NAMESPACE, cache_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    def download():
+        cached = cache.get(OWNERSHIP_NAMESPACE, cache_key)
+        if cached is not None:
+            return json.loads(cached)
+        with span("ownership_fetch"):
+            response = edgar.get(xml_url)
+        with span("form4_parse"):
+            document = parse_ownership_xml(response.content)
+        cache.set(OWNERSHIP_NAMESPACE, cache_key, json.dumps(document))
+        return document
+
+    return fetch_flight.do(cache_key, download)
+
+def get_ownerships(urls: list, max_workers: int = FETCH_WORKERS) -> list:
+    """
+    Fetch and parse several Form 4s concurrently.
+    Returns one dict per input URL, in input order:
+    { 'url': str, 'ownership': dict or None, 'error': str or None }
+    """
+    results = _fetch_concurrently(lambda i, url: fetch_ownership(url), urls, max_workers, "ownership")
+    return [{"url": url, "ownership": doc, "error": error} for url, (doc, error) in zip(urls, results)]
@@ -0,0 +1,79 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller (the leader)
+    runs the computation and everyone who arrives while it is in flight waits
+    for, and shares, its result or exception. Nothing is kept once the call
+    completes; results are the cache's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def acquire(self, key: str):
+        """
+        Lower-level API for computations that aren't a single function call
+        (e.g. streams). Returns (call, leader). The leader must call release();
+        everyone else calls call.wait().
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._stats["executions"] += 1
+            return call, True
+
+    def release(self, key: str, call: _Call, result=None, error: Exception = None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if error is not None:
+                self._stats["errors"] += 1
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    def do(self, key: str, fn):
+        """
+        Run fn() once for all concurrent callers with this key.
+        """
+        call, leader = self.acquire(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = fn()
+        except Exception as e:
+            self.release(key, call, error=e)
+            raise
+        self.release(key, call, result=result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+
+# Identical analyses (keyed by analyzer cache keys) and filing fetches (keyed by scraper cache keys)
+analysis_flight = SingleFlight("analysis")
+fetch_flight = SingleFlight("fetch")
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Only the columns get_recent_filings actually uses are kept in memory
+COLUMNS = ("accessionNumber", "form", "filingDate", "reportDate", "primaryDocument")
+
+# Within this window a cached submissions doc is served without even revalidating
+MAX_AGE_SECONDS = int(os.getenv("SUBMISSIONS_MAX_AGE", 30))
+MAX_ENTRIES = int(os.getenv("SUBMISSIONS_CACHE_SIZE", 5000))
+
+
+class SubmissionsEntry:
+    """
+    Parsed `filings.recent` columns for one CIK plus the validators needed
+    to revalidate it.
+    """
+
+    def __init__(self, recent: dict, etag: str = None, last_modified: str = None):
+        self.columns = {name: recent.get(name, []) for name in COLUMNS}
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = time.time()
+        # Set once the scraper has written these rows to the filing store
+        self.stored = False
+        self._by_form = None
+
+    def __len__(self):
+        return len(self.columns["accessionNumber"])
+
+    def rows_for_form(self, form: str) -> list:
+        """
+        Row indices for a form type, newest first. Built once per entry.
+        """
+        if self._by_form is None:
+            by_form = {}
+            for i, f in enumerate(self.columns["form"]):
+                by_form.setdefault(f, []).append(i)
+            self._by_form = by_form
+        return self._by_form.get(form, [])
+
+
+class SubmissionsCache:
+    """
+    CIK -> submissions cache that revalidates with If-None-Match /
+    If-Modified-Since. A 304 reuses the parsed columns as-is.
+    """
+
+    def __init__(self, fetch, max_age: int = MAX_AGE_SECONDS, max_entries: int = MAX_ENTRIES):
+        # fetch(url, headers) must return a requests-style response (status_code, headers, json())
+        self._fetch = fetch
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"fresh": 0, "not_modified": 0, "downloaded": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _store(self, cik: str, entry: SubmissionsEntry):
+        with self._lock:
+            self._entries[cik] = entry
+            self._entries.move_to_end(cik)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, cik: str) -> SubmissionsEntry:
+        """
+        Return the submissions entry for a 10-digit CIK. Raises on fetch errors
+        unless a previously cached entry can be served instead.
+        """
+        with self._lock:
+            entry = self._entries.get(cik)
+            if entry is not None:
+                self._entries.move_to_end(cik)
+
+        if entry is not None and time.time() - entry.validated_at < self.max_age:
+            self._count("fresh")
+            return entry
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+        try:
+            response = self._fetch(url, headers)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Revalidating submissions for CIK {cik} failed, serving cached copy: {e}")
+            return entry
+
+        if response.status_code == 304 and entry is not None:
+            self._count("not_modified")
+            entry.validated_at = time.time()
+            return entry
+
+        self._count("downloaded")
+        data = response.json()
+        entry = SubmissionsEntry(
+            data.get("filings", {}).get("recent", {}),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self._store(cik, entry)
+        return entry
+
+    def expire(self, cik: str):
+        """
+        Force the next get() to revalidate, keeping the validators so an
+        unchanged document still comes back as a cheap 304.
+        """
+        with self._lock:
+            entry = self._entries.get(cik)
+            if entry is not None:
+                entry.validated_at = 0.0
+
+    def invalidate(self, cik: str):
+        with self._lock:
+            self._entries.pop(cik, None)
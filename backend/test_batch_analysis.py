@@ -1,7 +1,17 @@
-from analyzer import analyze_filings_batch
-import google.genai
+import os
 import sys
 
+import google.genai
+from dotenv import load_dotenv
+
+# Offline against the fake LLM backend unless a Gemini key is configured
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+if not os.getenv("GEMINI_API_KEY"):
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LLM_FAKE_LATENCY_MS", "50")
+
+from analyzer import analyze_filings_batch, AnalysisError
+
 print(f"GenAI Version: {google.genai.__version__}")
 
 # Mock filings
@@ -15,7 +25,10 @@ filings = [
 ]
 
 print("Testing batch analysis...")
-result = analyze_filings_batch("AAPL", filings)
+try:
+    result = analyze_filings_batch("AAPL", filings)
+except AnalysisError as e:
+    result = f"Analysis Error: {e}"
 print("-" * 20)
 print(result)
 print("-" * 20)
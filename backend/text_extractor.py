@@ -0,0 +1,86 @@
+import re
+
+from lxml import etree
+
+CHUNK_SIZE = 64 * 1024
+
+# Elements whose content never makes it into the text.
+# ix:header holds the hidden inline-XBRL facts at the top of 10-K/10-Q documents.
+SKIP_TAGS = {"script", "style", "noscript", "ix:header", "head"}
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+
+
+class _BudgetReached(Exception):
+    pass
+
+
+class _TextCollector:
+    """
+    lxml parser target: receives start/end/data callbacks in document order
+    without building a tree, and keeps stripped text nodes until the budget is used up.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self._buffer = []
+        # One flag per open element: is this element (or an ancestor) skipped?
+        self._skip_stack = []
+
+    @property
+    def skipping(self) -> bool:
+        return bool(self._skip_stack) and self._skip_stack[-1]
+
+    def _flush(self):
+        # Same as BeautifulSoup's get_text(separator="\n", strip=True): one line per text node
+        if not self._buffer:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if not text:
+            return
+        self.parts.append(text)
+        self.length += len(text) + 1
+        if self.length >= self.max_chars:
+            raise _BudgetReached()
+
+    def start(self, tag, attrib):
+        self._flush()
+        tag = tag.lower() if isinstance(tag, str) else ""
+        skip = self.skipping or tag in SKIP_TAGS or bool(HIDDEN_STYLE.search(attrib.get("style", "")))
+        self._skip_stack.append(skip)
+
+    def end(self, tag):
+        self._flush()
+        if self._skip_stack:
+            self._skip_stack.pop()
+
+    def data(self, data):
+        if not self.skipping:
+            self._buffer.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._flush()
+        return "\n".join(self.parts)[:self.max_chars]
+
+
+def extract_text(chunks, max_chars: int, encoding: str = None) -> str:
+    """
+    Extract visible text from an HTML document given as an iterable of byte chunks
+    (e.g. response.iter_content()). Stops reading as soon as max_chars of text
+    have been produced, so the rest of the document is never downloaded or parsed.
+    """
+    collector = _TextCollector(max_chars)
+    parser = etree.HTMLParser(target=collector, encoding=encoding, recover=True, no_network=True)
+    try:
+        for chunk in chunks:
+            if chunk:
+                parser.feed(chunk)
+        return parser.close()
+    except _BudgetReached:
+        return "\n".join(collector.parts)[:max_chars]
+
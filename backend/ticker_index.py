@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Snapshot lives next to the other cached SEC data so cold starts work offline
+SNAPSHOT_PATH = os.getenv("TICKER_SNAPSHOT_PATH", os.path.join(os.path.dirname(__file__), "cache", "company_tickers.json"))
+
+# company_tickers.json changes a handful of times a day at most
+TTL_SECONDS = int(os.getenv("TICKER_INDEX_TTL", 24 * 60 * 60))
+
+# Don't hammer SEC if a refresh fails, wait at least this long before retrying
+RETRY_SECONDS = 5 * 60
+# ...but while there is no index at all every lookup fails, so retry a cold load sooner
+COLD_RETRY_SECONDS = 5
+
+
+class TickerIndex:
+    """
+    Process-wide ticker <-> CIK index.
+    Loads once (from the on-disk snapshot if there is one), then refreshes
+    in a background thread when the TTL expires. Lookups are dict hits.
+    """
+
+    def __init__(self, fetch, snapshot_path: str = SNAPSHOT_PATH, ttl: int = TTL_SECONDS):
+        # fetch() must return the raw company_tickers.json payload as a dict
+        self._fetch = fetch
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._by_ticker = {}
+        self._by_cik = {}
+        self._fetched_at = 0.0
+        self._last_attempt = 0.0
+        self._loaded = False
+
+    # -- Loading ---------------------------------------------------------
+
+    def _build(self, data: dict):
+        """
+        Turn the SEC payload ({"0": {"cik_str": .., "ticker": .., "title": ..}, ...})
+        into lookup dicts.
+        """
+        by_ticker = {}
+        by_cik = {}
+        for entry in data.values():
+            ticker = str(entry['ticker']).upper()
+            # CIK must be 10 digits, padded with leading zeros
+            cik = str(entry['cik_str']).zfill(10)
+            record = {"ticker": ticker, "cik": cik, "title": entry.get('title', '')}
+            by_ticker[ticker] = record
+            # SEC lists the primary share class first, keep that one for reverse lookups
+            by_cik.setdefault(cik, record)
+        return by_ticker, by_cik
+
+    def _swap(self, data: dict, fetched_at: float):
+        by_ticker, by_cik = self._build(data)
+        with self._lock:
+            self._by_ticker = by_ticker
+            self._by_cik = by_cik
+            self._fetched_at = fetched_at
+            self._loaded = True
+
+    def _load_snapshot(self) -> bool:
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._swap(snapshot["data"], snapshot.get("fetched_at", 0.0))
+            logger.info(f"Loaded ticker index snapshot ({len(self._by_ticker)} tickers)")
+            return True
+        except Exception as e:
+            logger.error(f"Error reading ticker index snapshot: {e}")
+            return False
+
+    def _save_snapshot(self, data: dict, fetched_at: float):
+        # Write to a temp file and rename so readers never see a partial snapshot
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": fetched_at, "data": data}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.error(f"Error writing ticker index snapshot: {e}")
+
+    def refresh(self) -> bool:
+        """
+        Download company_tickers.json and swap it in. Keeps the old index on failure.
+        """
+        self._last_attempt = time.time()
+        try:
+            data = self._fetch()
+            fetched_at = time.time()
+            self._swap(data, fetched_at)
+            self._save_snapshot(data, fetched_at)
+            logger.info(f"Refreshed ticker index ({len(self._by_ticker)} tickers)")
+            return True
+        except Exception as e:
+            logger.error(f"Error refreshing ticker index: {e}")
+            return False
+        finally:
+            self._refreshing = False
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="ticker-index-refresh", daemon=True).start()
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._load_lock:
+                # Only one caller does the cold load, the rest wait on the lock
+                if not self._loaded and time.time() - self._last_attempt > COLD_RETRY_SECONDS:
+                    if not self._load_snapshot():
+                        self.refresh()
+            if not self._loaded:
+                return
+
+        now = time.time()
+        stale = now - self._fetched_at > self.ttl
+        if stale and now - self._last_attempt > RETRY_SECONDS:
+            self._refresh_in_background()
+
+    # -- Lookups ---------------------------------------------------------
+
+    def get_cik(self, ticker: str):
+        """
+        Return the 10-digit CIK for a ticker, or None.
+        """
+        self._ensure_loaded()
+        record = self._by_ticker.get(ticker.upper())
+        return record["cik"] if record else None
+
+    def get_ticker(self, cik):
+        """
+        Reverse lookup: CIK (int or string, padded or not) -> primary ticker, or None.
+        """
+        self._ensure_loaded()
+        record = self._by_cik.get(str(cik).zfill(10))
+        return record["ticker"] if record else None
+
+    def __len__(self):
+        return len(self._by_ticker)
@@ -0,0 +1,97 @@
+import os
+
+# Bump when the planning rules change (it's part of the analysis cache keys)
+PLANNER_VERSION = "plan-v1"
+
+# Approximate tokenizer: English filing text averages about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Total document tokens per prompt, configurable so cost can be traded against latency
+COMPANY_TOKEN_BUDGET = int(os.getenv("COMPANY_TOKEN_BUDGET", 120000))
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", 30000))
+# Map step of a company analysis: each filing gets its own prompt of at most
+# FILING_TOKEN_BUDGET tokens, and together they share MAP_TOKEN_BUDGET
+FILING_TOKEN_BUDGET = int(os.getenv("FILING_TOKEN_BUDGET", 12500))
+MAP_TOKEN_BUDGET = int(os.getenv("MAP_TOKEN_BUDGET", 100000))
+
+# The foundation 10-K weighs as much as this many of the newest filing;
+# every older filing weighs RECENCY_DECAY times the one before it
+FOUNDATION_WEIGHT = 3.0
+RECENCY_DECAY = 0.8
+
+
+def count_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def tokens_to_chars(tokens: int) -> int:
+    return tokens * CHARS_PER_TOKEN
+
+
+def _allocate(demands: list, weights: list, budget: int) -> list:
+    """
+    Weighted water-fill: documents that fit in their weighted share of what's left
+    are packed whole, and the rest split the remainder in proportion to weight.
+    """
+    shares = [0] * len(demands)
+    active = set(range(len(demands)))
+    remaining = budget
+    while active:
+        total_weight = sum(weights[i] for i in active)
+        fits = [i for i in active if demands[i] <= remaining * weights[i] / total_weight]
+        if not fits:
+            for i in active:
+                shares[i] = int(remaining * weights[i] / total_weight)
+            break
+        for i in fits:
+            shares[i] = demands[i]
+            remaining -= demands[i]
+            active.remove(i)
+    return shares
+
+
+def plan_budget(documents: list, budget: int, foundation: bool = True) -> dict:
+    """
+    Share a token budget across documents for one prompt.
+    documents: list of dicts { 'form', 'filingDate', 'content', 'accessionNumber' }
+    With foundation=True the newest 10-K gets priority; otherwise, and after it,
+    newer filings get more than older ones.
+    Returns { 'budget', 'allotted', 'truncated', 'documents': [...] } with one entry per
+    input document, in input order: { 'form', 'filingDate', 'accessionNumber', 'tokens', 'allotted', 'whole' }
+    """
+    demands = [count_tokens(d.get('content', '')) for d in documents]
+    by_recency = sorted(range(len(documents)), key=lambda i: documents[i].get('filingDate', ''), reverse=True)
+    weights = [0.0] * len(documents)
+    for rank, i in enumerate(by_recency):
+        weights[i] = RECENCY_DECAY ** rank
+    if foundation:
+        ten_k = next((i for i in by_recency if documents[i].get('form', '').split('/')[0] == '10-K'), None)
+        if ten_k is not None:
+            weights[ten_k] = FOUNDATION_WEIGHT
+
+    shares = _allocate(demands, weights, max(0, budget))
+    entries = [{
+        'form': d.get('form'),
+        'filingDate': d.get('filingDate'),
+        'accessionNumber': d.get('accessionNumber'),
+        'tokens': demand,
+        'allotted': share,
+        'whole': share >= demand,
+    } for d, demand, share in zip(documents, demands, shares)]
+    return {
+        'budget': budget,
+        'allotted': sum(shares),
+        'truncated': sum(1 for e in entries if not e['whole']),
+        'documents': entries,
+    }
+
+
+def format_plan(plan: dict) -> str:
+    """
+    One-line summary for the logs: "12000/30000 tokens: 10-K 2025-02-01 8000/90000, 8-K ... whole".
+    """
+    docs = ", ".join(
+        f"{d['form']} {d['filingDate']} {'whole' if d['whole'] else str(d['allotted']) + '/' + str(d['tokens'])}"
+        for d in plan['documents']
+    )
+    return f"{plan['allotted']}/{plan['budget']} tokens: {docs}"
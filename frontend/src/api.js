@@ -10,12 +10,42 @@ export async function trackTicker(ticker) {
     return response.json();
 }
 
-export async function analyzeFiling(url, ticker, form) {
-    // Correct query params syntax
-    const response = await fetch(`${API_BASE}/api/analyze?url=${encodeURIComponent(url)}&ticker=${ticker}&form=${form}`, {
-        method: "POST"
-    });
-    if (!response.ok) throw new Error("Failed to analyze filing");
+// Analyses run as background jobs: the POST returns a job id, then we poll
+// /api/jobs/{id} until the job is done and resolve with its result.
+async function waitForJob(response, errorMessage) {
+    if (!response.ok) throw new Error(errorMessage);
+    const { job_id } = await response.json();
+    let delay = 500;
+    for (;;) {
+        await new Promise((resolve) => setTimeout(resolve, delay));
+        const poll = await fetch(`${API_BASE}/api/jobs/${job_id}`);
+        if (!poll.ok) throw new Error(errorMessage);
+        const job = await poll.json();
+        if (job.status === "done") return job.result;
+        if (job.status === "failed") {
+            // 4xx: the request itself was bad (e.g. unknown ticker), retrying won't help.
+            // 5xx: EDGAR or the model was unavailable, worth trying again later.
+            const detail = job.error || errorMessage;
+            const error = new Error(job.status_code >= 500 ? `${detail} (service unavailable, try again later)` : detail);
+            error.status = job.status_code;
+            throw error;
+        }
+        delay = Math.min(delay * 1.5, 3000);
+    }
+}
+
+// Filing history from the backend's filing store, newest first. Pass the
+// previous page's next_cursor as `cursor` to continue.
+export async function getFilings({ ticker, forms, since, until, limit, cursor } = {}) {
+    const params = new URLSearchParams();
+    if (ticker) params.set("ticker", ticker);
+    if (forms) params.set("forms", Array.isArray(forms) ? forms.join(",") : forms);
+    if (since) params.set("since", since);
+    if (until) params.set("until", until);
+    if (limit) params.set("limit", limit);
+    if (cursor) params.set("cursor", cursor);
+    const response = await fetch(`${API_BASE}/api/filings?${params}`);
+    if (!response.ok) throw new Error("Failed to get filings");
     return response.json();
 }
 
@@ -25,14 +55,42 @@ export async function getFeed() {
     return response.json();
 }
 
-export async function analyzeCompany(ticker) {
-    const response = await fetch(`${API_BASE}/api/analyze-company`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ ticker }),
+// Live feed over Server-Sent Events. EventSource reconnects on its own and
+// resumes with Last-Event-ID. Returns a function that closes the stream.
+export function streamFeed(onFiling) {
+    const source = new EventSource(`${API_BASE}/api/feed/stream`);
+    source.addEventListener("filing", (event) => onFiling(JSON.parse(event.data)));
+    return () => source.close();
+}
+
+// Streamed analyses over Server-Sent Events: onChunk receives markdown as it is
+// generated, onDone/onError end the stream. Returns a function that closes it.
+function streamReport(path, { onChunk, onDone, onError }) {
+    const source = new EventSource(`${API_BASE}${path}`);
+    let opened = false;
+    source.addEventListener("status", () => { opened = true; });
+    source.addEventListener("chunk", (event) => onChunk(JSON.parse(event.data).text));
+    source.addEventListener("done", (event) => {
+        source.close();
+        onDone && onDone(JSON.parse(event.data));
     });
-    if (!response.ok) throw new Error("Failed to analyze company");
-    return response.json();
+    source.addEventListener("error", (event) => {
+        source.close();
+        // Server-sent error events carry a detail, connection failures don't. A
+        // stream refused up front (e.g. 503 when too many are running) never opens.
+        const detail = event.data ? JSON.parse(event.data).detail
+            : opened ? "Connection lost" : "Could not start the analysis, the server may be busy; try again shortly";
+        onError && onError(detail);
+    });
+    return () => source.close();
+}
+
+export function streamFilingAnalysis(url, ticker, form, handlers) {
+    return streamReport(`/api/analyze/stream?url=${encodeURIComponent(url)}&ticker=${ticker}&form=${form}`, handlers);
+}
+
+export function streamCompanyAnalysis(ticker, handlers) {
+    return streamReport(`/api/analyze-company/stream?ticker=${ticker}`, handlers);
 }
 
 export async function getTrackedTickers() {
@@ -47,8 +105,7 @@ export async function analyzeBatch(ticker, filings) {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ ticker, filings }),
     });
-    if (!response.ok) throw new Error("Failed to analyze batch");
-    return response.json();
+    return waitForJob(response, "Failed to analyze batch");
 }
 
 
@@ -2,10 +2,17 @@ import sys
 import os
 import asyncio
 import json
+from dotenv import load_dotenv
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
+# Offline against the fake LLM backend unless a Gemini key is configured
+load_dotenv(os.path.join(os.path.dirname(__file__), 'backend', '.env'))
+if not os.getenv("GEMINI_API_KEY"):
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LLM_FAKE_LATENCY_MS", "50")
+
 from analyzer import analyze_filings_batch
 
 # Mock filings data